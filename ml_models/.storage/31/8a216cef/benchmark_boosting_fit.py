@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Gradient Boosting Fit Benchmark
+===============================
+
+Times SimpleGradientBoosting.fit, which factorizes the normal equations once,
+against the original loop that refits a SimpleLinearRegression from scratch
+every round, as n_estimators grows.
+
+Usage:
+    python benchmark_boosting_fit.py [--estimators 10 30 100 300] [--samples 200000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from carbon_models.models import SimpleGradientBoosting, SimpleLinearRegression
+
+
+def fit_reference(model, X, y):
+    """Original fit: a full SimpleLinearRegression solve per round"""
+    model.initial_prediction = np.mean(y)
+    model.models = []
+    current_predictions = np.full(len(y), model.initial_prediction)
+    for _ in range(model.n_estimators):
+        residuals = y - current_predictions
+        round_model = SimpleLinearRegression()
+        round_model.fit(X, residuals)
+        current_predictions += model.learning_rate * round_model.predict(X)
+        model.models.append(round_model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--estimators', type=int, nargs='+', default=[10, 30, 100, 300])
+    parser.add_argument('--samples', type=int, default=200_000)
+    parser.add_argument('--features', type=int, default=20)
+    args = parser.parse_args()
+
+    print("=== GRADIENT BOOSTING FIT BENCHMARK ===\n")
+    print(f"{args.samples:,} samples, {args.features} features\n")
+    print(f"{'Estimators':>10} {'Reference (s)':>14} {'Factorized (s)':>15} {'Speedup':>9} {'Max |Δpred|':>12}")
+    print("-" * 64)
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(args.samples, args.features))
+    y = X @ rng.normal(size=args.features) + rng.normal(0, 1, args.samples)
+
+    for n_estimators in args.estimators:
+        reference = SimpleGradientBoosting(n_estimators=n_estimators, learning_rate=0.1)
+        start = time.perf_counter()
+        fit_reference(reference, X, y)
+        reference_time = time.perf_counter() - start
+
+        model = SimpleGradientBoosting(n_estimators=n_estimators, learning_rate=0.1)
+        start = time.perf_counter()
+        model.fit(X, y)
+        fit_time = time.perf_counter() - start
+
+        max_diff = np.max(np.abs(reference.predict(X) - model.predict(X)))
+        print(f"{n_estimators:>10} {reference_time:>14.3f} {fit_time:>15.3f} "
+              f"{reference_time / fit_time:>8.1f}x {max_diff:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
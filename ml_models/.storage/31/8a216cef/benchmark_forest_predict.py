@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Random Forest Prediction Benchmark
+==================================
+
+Compares the flat-array batch traversal in SimpleRandomForest.predict with
+the original per-row recursive prediction, and checks that both agree exactly.
+
+Usage:
+    python benchmark_forest_predict.py [--rows 100000 1000000 10000000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from carbon_models.models import SimpleRandomForest
+
+
+def predict_per_row(model, X):
+    """Original prediction path: recurse through every tree for every row"""
+    predictions = np.zeros(X.shape[0])
+    for i, x in enumerate(X):
+        tree_predictions = [model._predict_tree(tree, x) for tree in model.trees]
+        predictions[i] = np.mean(tree_predictions)
+    return predictions
+
+
+def make_rows(n_rows, rng):
+    """Synthetic NDVI, canopy cover and soil carbon rows"""
+    return np.column_stack([
+        rng.beta(2, 2, n_rows) * 0.8 + 0.1,
+        rng.beta(1.5, 1.5, n_rows) * 100,
+        rng.gamma(2, 1.5, n_rows) + 0.5
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--n-trees', type=int, default=20)
+    parser.add_argument('--max-depth', type=int, default=6)
+    parser.add_argument('--reference-rows', type=int, default=20_000,
+                        help="rows scored with the per-row path (it is far too slow for full sizes)")
+    args = parser.parse_args()
+
+    print("=== RANDOM FOREST PREDICTION BENCHMARK ===\n")
+
+    rng = np.random.default_rng(42)
+    X_train = make_rows(1000, rng)
+    y_train = X_train @ np.array([30.0, 0.2, 8.0]) + rng.normal(0, 5, 1000)
+
+    np.random.seed(42)
+    model = SimpleRandomForest(n_trees=args.n_trees, max_depth=args.max_depth)
+    model.fit(X_train, y_train)
+    print(f"Forest: {args.n_trees} trees, max depth {args.max_depth}, "
+          f"{len(model.flat_trees['feature'])} nodes\n")
+
+    print(f"{'Rows':>12} {'Per-row (rows/s)':>18} {'Batch (rows/s)':>16} {'Speedup':>9} {'Exact':>6}")
+    print("-" * 65)
+
+    for n_rows in args.rows:
+        X = make_rows(n_rows, rng)
+
+        start = time.perf_counter()
+        batch_pred = model.predict(X)
+        batch_rate = n_rows / (time.perf_counter() - start)
+
+        # Time the per-row path on a prefix and extrapolate its throughput
+        n_ref = min(n_rows, args.reference_rows)
+        start = time.perf_counter()
+        reference_pred = predict_per_row(model, X[:n_ref])
+        reference_rate = n_ref / (time.perf_counter() - start)
+
+        exact = np.array_equal(reference_pred, batch_pred[:n_ref])
+        print(f"{n_rows:>12,} {reference_rate:>18,.0f} {batch_rate:>16,.0f} "
+              f"{batch_rate / reference_rate:>8.1f}x {'yes' if exact else 'NO':>6}")
+
+
+if __name__ == "__main__":
+    main()
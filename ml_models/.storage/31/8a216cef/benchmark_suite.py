@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Carbon Model Benchmark Suite
+============================
+
+Measures how every carbon model scales: the four classes in
+carbon_models.models and the standard-library SimpleLinearModel from
+simple_carbon_model.py. For each model, sample count and feature count it
+records fit time, predict throughput (rows/s) and the peak resident set size
+of the process.
+
+Every case runs in a fresh process, so peak RSS belongs to that case alone
+and no model warms caches for the next. Data comes from a seeded generator,
+so every run sees identical inputs. Timings are the best of --repeat runs.
+
+Results are written as JSON. With --baseline, each case is compared against
+the same case in an earlier results file, and the run exits non-zero when fit
+time or peak RSS grows, or predict throughput drops, by more than
+--threshold (a fraction: 0.10 = 10%). Timings shorter than --min-seconds in
+both runs are not compared.
+
+Usage:
+    python benchmark_suite.py [--samples 1000 10000 100000] [--features 3 9]
+        [--models forest boosting] [--output results.json]
+        [--baseline baseline.json] [--threshold 0.10]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from multiprocessing import get_context
+
+import numpy as np
+
+from benchmark_forest_fit import make_data
+from carbon_models.profiling import peak_rss_mb
+
+SIMPLE_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, '34', 'edd236d3')
+
+# Benchmarked configurations mirror the models compared by `carbon_models train`
+MODELS = {
+    'linear': ('carbon_models.models', 'SimpleLinearRegression', {}),
+    'forest': ('carbon_models.models', 'SimpleRandomForest', {'n_trees': 20, 'max_depth': 6}),
+    'boosting': ('carbon_models.models', 'SimpleGradientBoosting',
+                 {'n_estimators': 30, 'learning_rate': 0.1}),
+    'neural': ('carbon_models.models', 'SimpleNeuralNetwork',
+               {'hidden_size': 15, 'learning_rate': 0.01, 'epochs': 100}),
+    'simple_linear': ('simple_carbon_model', 'SimpleLinearModel', {})
+}
+
+# Metric -> +1 when larger is worse, -1 when smaller is worse
+METRICS = {'fit_seconds': 1, 'predict_rows_per_second': -1, 'peak_rss_mb': 1}
+
+
+def _best_time(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_case(model_name, n_samples, n_features, seed, repeat, simple_model_dir):
+    """Fit and predict one model on one data size; runs in its own process"""
+    module_name, class_name, params = MODELS[model_name]
+    if module_name == 'simple_carbon_model':
+        sys.path.insert(0, simple_model_dir)
+    module = import_module(module_name)
+
+    X, y = make_data(n_samples, n_features, np.random.default_rng(seed))
+    if module_name == 'simple_carbon_model':
+        X, y = X.tolist(), y.tolist()
+
+    def fit():
+        model = getattr(module, class_name)(**params)
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.fit(X, y)
+        return model
+
+    fit_seconds, model = _best_time(fit, repeat)
+    predict_seconds, predictions = _best_time(lambda: model.predict(X), repeat)
+
+    predictions = np.asarray(predictions, dtype=np.float64)
+    y = np.asarray(y)
+    r2 = 1 - np.sum((y - predictions)**2) / np.sum((y - np.mean(y))**2)
+    return {
+        'model': model_name,
+        'samples': n_samples,
+        'features': n_features,
+        'fit_seconds': fit_seconds,
+        'predict_rows_per_second': n_samples / predict_seconds,
+        'peak_rss_mb': peak_rss_mb(),
+        'train_r2': float(r2)
+    }
+
+
+def run_suite(models, samples, features, seed=42, repeat=1, simple_model_dir=SIMPLE_MODEL_DIR):
+    """Run every (model, samples, features) case, each in a fresh process"""
+    results = []
+    context = get_context('spawn')
+    for model_name in models:
+        for n_features in features:
+            for n_samples in samples:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    result = executor.submit(run_case, model_name, n_samples, n_features,
+                                             seed, repeat, simple_model_dir).result()
+                results.append(result)
+                print(f"{model_name:>14} {n_samples:>10,} {n_features:>8} {result['fit_seconds']:>10.3f} "
+                      f"{result['predict_rows_per_second']:>14,.0f} {result['peak_rss_mb']:>10.1f}",
+                      flush=True)
+    return results
+
+
+def _timed_seconds(result, metric):
+    if metric == 'fit_seconds':
+        return result['fit_seconds']
+    if metric == 'predict_rows_per_second':
+        return result['samples'] / result['predict_rows_per_second']
+    return None
+
+
+def compare(results, baseline, threshold, min_seconds=0.01):
+    """Regressions of results against baseline, as human-readable strings.
+
+    Timings below min_seconds in both runs are too noisy to gate on and are skipped.
+    """
+    reference = {(r['model'], r['samples'], r['features']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        key = (result['model'], result['samples'], result['features'])
+        if key not in reference:
+            continue
+        for metric, direction in METRICS.items():
+            old, new = reference[key][metric], result[metric]
+            seconds = _timed_seconds(result, metric)
+            if seconds is not None and max(seconds, _timed_seconds(reference[key], metric)) < min_seconds:
+                continue
+            change = (new - old) / old * direction
+            if change > threshold:
+                regressions.append(f"{key[0]} samples={key[1]:,} features={key[2]}: "
+                                   f"{metric} {old:,.4g} -> {new:,.4g} ({change:+.1%} worse)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--models', nargs='+', choices=list(MODELS), default=list(MODELS))
+    parser.add_argument('--samples', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--features', type=int, nargs='+', default=[3, 9])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=None)
+    parser.add_argument('--threshold', type=float, default=0.10)
+    parser.add_argument('--min-seconds', type=float, default=0.01,
+                        help="ignore timings shorter than this in both runs")
+    parser.add_argument('--simple-model-dir', default=SIMPLE_MODEL_DIR)
+    args = parser.parse_args()
+
+    print("=== CARBON MODEL BENCHMARK SUITE ===\n")
+    print(f"{'Model':>14} {'Samples':>10} {'Features':>8} {'Fit (s)':>10} {'Predict rows/s':>14} {'Peak MB':>10}")
+    print("-" * 71)
+    results = run_suite(args.models, args.samples, args.features, args.seed, args.repeat,
+                        args.simple_model_dir)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {'seed': args.seed, 'repeat': args.repeat},
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"\n✗ {len(regressions)} regression(s) beyond {args.threshold:.0%} against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"✓ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Carbon Stock Estimation Models
+==============================
+
+Importable library behind the training scripts:
+
+    carbon_models.models     SimpleLinearRegression, SimpleRandomForest,
+                             SimpleGradientBoosting, SimpleNeuralNetwork
+    carbon_models.metrics    calculate_metrics, StreamingMetrics
+    carbon_models.data_io    training data loading, feature tables, outputs
+    carbon_models.dataset    memory-mapped columnar training datasets
+    carbon_models.artifact   save_model / load_model (binary model format)
+    carbon_models.cache      content-addressed, LRU-capped cache of fitted models
+    carbon_models.codegen    generated single-row predictors cached beside artifacts
+    carbon_models.columnar   column-per-file .npy output (predictions)
+    carbon_models.cross_validation  parallel k-fold / spatially blocked CV
+    carbon_models.search     successive halving / Hyperband search
+    carbon_models.importance permutation feature importance
+    carbon_models.profiling  nested phase timers, memory figures, profile dumps
+    carbon_models.shared_arrays  worker pool sizing and shared-memory arrays for process pools
+    carbon_models.cli        train / evaluate / cv / search / predict subcommands
+
+Importing the package loads none of these; the names below resolve (and
+import NumPy) on first access, so `import carbon_models` stays cheap for
+workers and command-line start-up.
+"""
+
+_EXPORTS = {
+    'SimpleLinearRegression': 'models',
+    'SimpleRandomForest': 'models',
+    'SimpleGradientBoosting': 'models',
+    'SimpleNeuralNetwork': 'models',
+    'calculate_metrics': 'metrics',
+    'StreamingMetrics': 'metrics',
+    'dict_to_array': 'data_io',
+    'load_training_data': 'data_io',
+    'save_model': 'artifact',
+    'load_model': 'artifact'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
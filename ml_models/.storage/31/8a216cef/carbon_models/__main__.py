@@ -0,0 +1,3 @@
+from carbon_models.cli import main
+
+main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Carbon Model Artifact Format
+============================
+
+A versioned on-disk format for the four model classes in
+carbon_models.models, replacing pickled model objects.
+
+Layout (all integers little-endian):
+
+    8 bytes   magic b'CRBNMDL\\0'
+    uint32    format version
+    uint32    header length in bytes
+    header    UTF-8 JSON, padded with spaces to a 64-byte boundary
+    data      raw little-endian arrays, each starting on a 64-byte boundary
+
+The JSON header records the model class, its constructor parameters, scalar
+state, the dtype/shape/offset of every array and free-form metadata (feature
+names, scores). Linear models (and gradient boosting, which is a sum of
+linear models) also carry their effective coefficients in the header, so
+services such as server/lib/mlService.ts can read them without touching the
+binary section.
+
+Loading maps the file read-only: arrays are views into the mapping and are
+never copied, so opening even a large forest costs little more than reading
+the header.
+
+Usage:
+    python -m carbon_models.artifact info ARTIFACT
+    python -m carbon_models.artifact coefficients ARTIFACT
+"""
+
+import argparse
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'CRBNMDL\0'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct('<8sII')
+
+
+def _align(n):
+    return -(-n // ALIGNMENT) * ALIGNMENT
+
+
+def _constructor_params(model):
+    """Constructor arguments of model, made JSON-friendly"""
+    from carbon_models.models import get_params
+
+    params = get_params(model)
+    if 'dtype' in params:
+        params['dtype'] = np.dtype(params['dtype']).name
+    return params
+
+
+# Per-class codecs: dump(model) -> (scalars, arrays); load(model, scalars, arrays)
+
+def _dump_linear(model):
+    return {'bias': float(model.bias)}, {'weights': model.weights.astype('<f8')}
+
+def _load_linear(model, scalars, arrays):
+    model.bias = scalars['bias']
+    model.weights = arrays['weights']
+
+
+def _dump_forest(model):
+    if getattr(model, 'flat_trees', None) is None:
+        model._compile_trees()
+    flat = model.flat_trees
+    arrays = {name: flat[name].astype('<i4') for name in ('feature', 'left', 'right', 'roots', 'depths')}
+    arrays['threshold'] = flat['threshold'].astype('<f8')
+    arrays['value'] = flat['value'].astype('<f8')
+    return {}, arrays
+
+def _load_forest(model, scalars, arrays):
+    model.flat_trees = dict(arrays)
+
+
+def _dump_boosting(model):
+    n_features = len(model.models[0].weights) if model.models else 0
+    weights = np.array([m.weights for m in model.models], dtype='<f8').reshape(-1, n_features)
+    biases = np.array([m.bias for m in model.models], dtype='<f8')
+    return {'initial_prediction': float(model.initial_prediction)}, {'weights': weights, 'biases': biases}
+
+def _load_boosting(model, scalars, arrays):
+    from carbon_models.models import SimpleLinearRegression
+    model.initial_prediction = scalars['initial_prediction']
+    model.models = []
+    for weights, bias in zip(arrays['weights'], arrays['biases']):
+        stage = SimpleLinearRegression()
+        stage.weights = weights
+        stage.bias = float(bias)
+        model.models.append(stage)
+
+
+def _dump_neural(model):
+    dtype = model.W1.dtype.newbyteorder('<')
+    arrays = {name: getattr(model, name).astype(dtype) for name in ('W1', 'b1', 'W2', 'b2')}
+    return {'y_mean': float(model.y_mean), 'y_std': float(model.y_std)}, arrays
+
+def _load_neural(model, scalars, arrays):
+    model.y_mean = scalars['y_mean']
+    model.y_std = scalars['y_std']
+    for name in ('W1', 'b1', 'W2', 'b2'):
+        setattr(model, name, arrays[name])
+
+
+_CODECS = {
+    'SimpleLinearRegression': (_dump_linear, _load_linear),
+    'SimpleRandomForest': (_dump_forest, _load_forest),
+    'SimpleGradientBoosting': (_dump_boosting, _load_boosting),
+    'SimpleNeuralNetwork': (_dump_neural, _load_neural)
+}
+
+
+def linear_coefficients(model):
+    """(bias, weights) of a model that is linear in its inputs, else None"""
+    class_name = type(model).__name__
+    if class_name == 'SimpleLinearRegression':
+        return float(model.bias), np.asarray(model.weights, dtype=np.float64)
+    if class_name == 'SimpleGradientBoosting':
+        # initial + lr * sum_k (b_k + w_k . x) collapses to one linear model
+        bias = float(model.initial_prediction +
+                     model.learning_rate * sum(float(m.bias) for m in model.models))
+        weights = model.learning_rate * np.sum([m.weights for m in model.models], axis=0)
+        return bias, np.asarray(weights, dtype=np.float64)
+    return None
+
+
+def _effective_coefficients(model, feature_names):
+    """Bias and per-feature weights of a model that is linear in its inputs, else None"""
+    coefficients = linear_coefficients(model)
+    if coefficients is None:
+        return None
+    bias, weights = coefficients
+    names = feature_names if feature_names is not None else [f"x{i}" for i in range(len(weights))]
+    return {'bias': bias, 'weights': dict(zip(names, (float(w) for w in weights)))}
+
+
+def save_model(model, path, feature_names=None, metadata=None):
+    """Write model to path in the artifact format"""
+    class_name = type(model).__name__
+    if class_name not in _CODECS:
+        raise TypeError(f"No artifact codec for {class_name}")
+    scalars, arrays = _CODECS[class_name][0](model)
+
+    array_specs = {}
+    offset = 0
+    for name, array in arrays.items():
+        array_specs[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = _align(offset + array.nbytes)
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'model_class': class_name,
+        'params': _constructor_params(model),
+        'scalars': scalars,
+        'arrays': array_specs,
+        'feature_names': list(feature_names) if feature_names is not None else None,
+        'coefficients': _effective_coefficients(model, feature_names),
+        'metadata': metadata or {}
+    }
+    header_bytes = json.dumps(header, default=float).encode('utf-8')
+    header_bytes += b' ' * (_align(_PREAMBLE.size + len(header_bytes)) - _PREAMBLE.size - len(header_bytes))
+
+    with open(path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        data_start = f.tell()
+        for name, array in arrays.items():
+            f.seek(data_start + array_specs[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+
+
+def read_header(path):
+    """The parsed JSON header and the byte offset where array data starts"""
+    with open(path, 'rb') as f:
+        magic, version, header_length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a carbon model artifact")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path} uses format version {version}; this reader supports up to {FORMAT_VERSION}")
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    return header, _PREAMBLE.size + header_length
+
+
+def load_model(path):
+    """Open an artifact as a ready-to-predict model whose arrays map the file"""
+    from carbon_models import models
+
+    header, data_start = read_header(path)
+    arrays = {}
+    if header['arrays']:
+        mapping = np.memmap(path, dtype=np.uint8, mode='r')
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape']))
+            start = data_start + spec['offset']
+            arrays[name] = mapping[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+
+    class_name = header['model_class']
+    model = getattr(models, class_name)(**header['params'])
+    _CODECS[class_name][1](model, header['scalars'], arrays)
+    model.feature_names = header['feature_names']
+    model.metadata = header['metadata']
+    return model
+
+
+def service_key(feature_name):
+    """mlService.ts coefficient key for a feature: Canopy_Cover_Percent -> canopyCoverPercent"""
+    first, *rest = feature_name.split('_')
+    return first.lower() + ''.join(part.capitalize() for part in rest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('command', choices=['info', 'coefficients'])
+    parser.add_argument('artifact')
+    args = parser.parse_args()
+
+    header, _ = read_header(args.artifact)
+    if args.command == 'info':
+        print(json.dumps(header, indent=2))
+        return
+
+    coefficients = header['coefficients']
+    if coefficients is None:
+        raise SystemExit(f"{header['model_class']} is not linear; no coefficients to export")
+    service = {'bias': coefficients['bias']}
+    service.update((service_key(name), weight) for name, weight in coefficients['weights'].items())
+    print(json.dumps(service, indent=2))
+
+
+if __name__ == "__main__":
+    main()
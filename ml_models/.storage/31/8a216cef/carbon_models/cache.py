@@ -0,0 +1,166 @@
+"""
+Training Cache
+==============
+
+A disk cache of fitted models, so reruns with unchanged inputs skip fit().
+
+An entry is keyed by a SHA-256 over the training data (X and y bytes, dtype
+and shape), the feature list, the model's class and constructor parameters,
+and the seed. It is stored as one model artifact (carbon_models.artifact)
+whose metadata carries the metrics recorded at training time:
+
+    <directory>/<key[:2]>/<key>.bin
+
+The cache is safe for concurrent use by parallel jobs without a server:
+
+  - entries are written to a temporary file and renamed into place, so a
+    reader sees a complete entry or none;
+  - a hit refreshes the entry's mtime, which serves as its last-use time;
+  - after each store, entries are evicted least recently used first until
+    the total size is under max_bytes, under an exclusive lock on
+    <directory>/.lock (where fcntl exists) so two jobs do not evict
+    concurrently;
+  - an entry removed between lookup and load is treated as a miss.
+
+Two jobs missing on the same key both train and both store; the entries are
+equivalent, so whichever rename lands last wins.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from carbon_models.artifact import load_model, save_model
+from carbon_models.models import get_params
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction runs unlocked
+    fcntl = None
+
+# Bump when the key's inputs or the entry layout change
+CACHE_VERSION = 1
+
+# Bytes of an array hashed per update, bounding the temporary copy of
+# non-contiguous views
+_HASH_CHUNK = 16 << 20
+
+
+def _hash_array(digest, array):
+    array = np.asarray(array)
+    digest.update(f"{array.dtype.str}{array.shape}".encode())
+    if array.ndim == 0 or array.size == 0:
+        digest.update(array.tobytes())
+        return
+    rows_per_chunk = max(1, _HASH_CHUNK // max(1, array[0].nbytes if array.ndim > 1 else array.itemsize))
+    for start in range(0, len(array), rows_per_chunk):
+        digest.update(np.ascontiguousarray(array[start:start + rows_per_chunk]).data)
+
+
+def data_digest(X, y, feature_names):
+    """Hex digest of the training inputs; compute once and reuse for every model"""
+    digest = hashlib.sha256()
+    _hash_array(digest, X)
+    _hash_array(digest, y)
+    digest.update(json.dumps([str(name) for name in feature_names]).encode())
+    return digest.hexdigest()
+
+
+def cache_key(data_hash, model, seed=None):
+    """Entry key for an unfitted model trained on data_hash with seed"""
+    model_class = type(model)
+    spec = {
+        'version': CACHE_VERSION,
+        'data': data_hash,
+        'model': f"{model_class.__module__}.{model_class.__qualname__}",
+        'params': get_params(model),
+        'seed': seed
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class TrainingCache:
+    """LRU-capped, content-addressed store of fitted models"""
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.bin")
+
+    def get(self, key):
+        """The cached model (with its training metrics in model.metadata), or None"""
+        path = self._path(key)
+        try:
+            model = load_model(path)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            # Not cached, evicted meanwhile, or unreadable
+            return None
+        return model
+
+    def put(self, key, model, feature_names=None, metadata=None):
+        """Store a fitted model, then evict down to max_bytes"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        os.close(fd)
+        try:
+            save_model(model, temp_path, feature_names=feature_names, metadata=metadata)
+            os.replace(temp_path, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    @contextlib.contextmanager
+    def _lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def entries(self):
+        """(mtime, size, path) of every entry, least recently used first"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.bin'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock():
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    # Open elsewhere (Windows); leave it for a later eviction
+                    continue
+                total -= size
+            return total
@@ -0,0 +1,508 @@
+"""
+Carbon Model Command Line
+=========================
+
+    python -m carbon_models train [--data FILE] [--output-dir DIR]
+    python -m carbon_models evaluate ARTIFACT [--data FILE]
+    python -m carbon_models cv [--data FILE] [--folds 5] [--coordinates XY.npy --block-size M]
+    python -m carbon_models search [--data FILE] [--eta 3] [--log trials.jsonl]
+    python -m carbon_models predict ARTIFACT FEATURES [--output FILE]
+
+Only argparse is imported up front; each subcommand imports NumPy and the
+modules it needs when it runs, so `--help` and argument errors are instant.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+
+DEFAULT_DATA_FILE = '/workspace/processed_carbon_data'
+DEFAULT_OUTPUT_DIR = '/workspace'
+
+
+def _load_data(data_file):
+    """Training data from data_file (a dataset directory or legacy .npz), else
+    from data_file + '.npz', or the synthetic set when neither exists"""
+    from carbon_models.data_io import load_training_data, synthetic_training_data
+
+    print("Loading preprocessed data...")
+    legacy_file = data_file + '.npz'
+    if not os.path.exists(data_file) and os.path.isfile(legacy_file):
+        # Deployments from before dataset directories only have the .npz
+        print(f"{data_file} not found; using {legacy_file} "
+              f"(convert it with: python -m carbon_models.dataset convert {legacy_file} {data_file})")
+        data_file = legacy_file
+    if os.path.exists(data_file):
+        X_train, y_train, X_test, y_test, feature_names = load_training_data(data_file)
+        print("✓ Preprocessed data loaded successfully")
+        print(f"Training samples: {len(y_train)}")
+        print(f"Test samples: {len(y_test)}")
+        print(f"Features: {len(feature_names)}")
+    else:
+        print(f"Preprocessed data not found at {data_file}. Creating synthetic data...")
+        X_train, y_train, X_test, y_test, feature_names = synthetic_training_data()
+        print(f"Created synthetic data: {len(y_train)} train, {len(y_test)} test samples")
+    return X_train, y_train, X_test, y_test, feature_names
+
+
+def _default_models(splitter='random', n_jobs=1, seed=None):
+    from carbon_models.models import (SimpleGradientBoosting, SimpleLinearRegression,
+                                      SimpleNeuralNetwork, SimpleRandomForest)
+
+    return [
+        SimpleLinearRegression(),
+        SimpleRandomForest(n_trees=20, max_depth=6, splitter=splitter, n_jobs=n_jobs, random_state=seed),
+        SimpleGradientBoosting(n_estimators=30, learning_rate=0.1),
+        SimpleNeuralNetwork(hidden_size=15, learning_rate=0.01, epochs=100)
+    ]
+
+
+def train(args):
+    from datetime import datetime
+
+    import numpy as np
+
+    from carbon_models.artifact import save_model
+    from carbon_models.columnar import ColumnarWriter, export_json
+    from carbon_models.data_io import dict_to_array, write_json
+    from carbon_models.importance import permutation_importance
+    from carbon_models.metrics import calculate_metrics
+    from carbon_models.profiling import PhaseProfiler
+
+    profile_path = args.profile_output
+    if args.profile and not profile_path:
+        profile_path = os.path.join(args.output_dir, 'train_profile' +
+                                    ('.pstats' if args.profile == 'cprofile' else '.txt'))
+    profiler = PhaseProfiler(trace_memory=args.trace_memory, profile=args.profile,
+                             profile_path=profile_path).start()
+
+    print("=== CARBON STOCK ESTIMATION MODEL TRAINING ===\n")
+
+    with profiler.phase('load_data') as phase:
+        try:
+            X_train, y_train, X_test, y_test, feature_names = _load_data(args.data)
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            profiler.stop()
+            raise SystemExit(1)
+        phase['rows'] = len(y_train) + len(y_test)
+
+    with profiler.phase('dict_to_array', rows=len(y_train) + len(y_test)):
+        X_train_array = dict_to_array(X_train, feature_names)
+        X_test_array = dict_to_array(X_test, feature_names)
+
+    print(f"Data shapes: X_train {X_train_array.shape}, X_test {X_test_array.shape}")
+
+    # Train all models
+    print("\n1. TRAINING MODELS")
+    print("-" * 50)
+
+    models = _default_models(args.splitter, n_jobs=args.n_jobs, seed=args.seed)
+
+    results = {}
+
+    cache = None
+    if args.cache_dir:
+        from carbon_models.cache import TrainingCache, cache_key, data_digest
+
+        cache = TrainingCache(args.cache_dir, max_bytes=int(args.cache_max_mb * (1 << 20)))
+        with profiler.phase('hash_data', rows=len(y_train)):
+            data_hash = data_digest(X_train_array, y_train, feature_names)
+
+    # Predictions are streamed to disk as each model produces them
+    predictions_dir = os.path.join(args.output_dir, 'model_predictions')
+    predictions = ColumnarWriter(predictions_dir, metadata={'train_samples': len(y_train),
+                                                            'test_samples': len(y_test)})
+    predictions.write({'y_train_true': y_train, 'y_test_true': y_test})
+
+    for model in models:
+        print(f"\nTraining {model.name}...")
+        try:
+            with profiler.phase(model.name):
+                key = cache_key(data_hash, model, args.seed) if cache else None
+                with profiler.phase('fit', rows=len(y_train)) as fit_phase:
+                    cached = cache.get(key) if cache else None
+                    if cached is not None:
+                        # Unchanged data, parameters and seed: reuse the stored fit
+                        fit_phase['name'] = 'load_cached'
+                        model = cached
+                    else:
+                        if args.seed is not None:
+                            np.random.seed(args.seed)
+                        model.fit(X_train_array, y_train)
+
+                # Make predictions
+                with profiler.phase('predict', rows=len(y_train) + len(y_test)) as predict_phase:
+                    train_pred = model.predict(X_train_array)
+                    test_pred = model.predict(X_test_array)
+
+                # Calculate metrics
+                with profiler.phase('metrics'):
+                    if cached is None:
+                        train_metrics = calculate_metrics(y_train, train_pred)
+                    else:
+                        train_metrics = cached.metadata['train_metrics']
+                    test_metrics = calculate_metrics(y_test, test_pred)
+
+                if cache and cached is None:
+                    with profiler.phase('cache_store'):
+                        cache.put(key, model, feature_names=[str(name) for name in feature_names],
+                                  metadata={'train_metrics': train_metrics,
+                                            'fit_seconds': fit_phase['seconds']})
+
+                with profiler.phase('write_predictions'):
+                    predictions.write({f'{model.name}_train_pred': train_pred,
+                                       f'{model.name}_test_pred': test_pred})
+
+            results[model.name] = {
+                'model': model,
+                'train_metrics': train_metrics,
+                'test_metrics': test_metrics,
+                'timing': {
+                    'cached': cached is not None,
+                    'fit_seconds': fit_phase['seconds'],
+                    'fit_rows_per_second': fit_phase['rows_per_second'],
+                    'predict_seconds': predict_phase['seconds'],
+                    'predict_rows_per_second': predict_phase['rows_per_second']
+                }
+            }
+
+            print(f"✓ {model.name} {'trained successfully' if cached is None else 'loaded from cache'}")
+            print(f"  Train R²: {train_metrics['R2']:.3f}, Test R²: {test_metrics['R2']:.3f}")
+
+        except Exception as e:
+            print(f"✗ Error training {model.name}: {e}")
+
+    with profiler.phase('close_predictions'):
+        predictions.close()
+
+    # Display results
+    print("\n2. MODEL COMPARISON")
+    print("-" * 50)
+
+    print(f"{'Model':<20} {'Train R²':<10} {'Test R²':<10} {'Test RMSE':<12} {'Test MAE':<10}")
+    print("-" * 62)
+
+    best_model = None
+    best_r2 = -float('inf')
+
+    for name, result in results.items():
+        train_r2 = result['train_metrics']['R2']
+        test_r2 = result['test_metrics']['R2']
+        test_rmse = result['test_metrics']['RMSE']
+        test_mae = result['test_metrics']['MAE']
+
+        print(f"{name:<20} {train_r2:<10.3f} {test_r2:<10.3f} {test_rmse:<12.3f} {test_mae:<10.3f}")
+
+        if test_r2 > best_r2:
+            best_r2 = test_r2
+            best_model = name
+
+    print(f"\nBest performing model: {best_model} (Test R² = {best_r2:.3f})")
+
+    # Feature importance analysis for best model
+    print(f"\n3. FEATURE IMPORTANCE ANALYSIS")
+    print("-" * 50)
+
+    feature_importance = {}
+    if best_model and best_model in results:
+        print(f"Analyzing feature importance for {best_model}...")
+
+        # Permutation importance: drop in the best model's test R² when a feature is shuffled
+        with profiler.phase('feature_importance', rows=5 * len(feature_names) * len(y_test)):
+            importance = permutation_importance(results[best_model]['model'], X_test_array, y_test,
+                                                feature_names=[str(name) for name in feature_names],
+                                                n_repeats=5, random_state=42)
+        feature_importance = {name: stats['importance'] for name, stats in importance.items()}
+
+        # Sort by importance
+        sorted_features = sorted(importance.items(), key=lambda x: x[1]['importance'], reverse=True)
+
+        print(f"Top 10 most important features (R² drop, 95% CI):")
+        for i, (feature, stats) in enumerate(sorted_features[:10], 1):
+            print(f"  {i:2d}. {feature:<30}: {stats['importance']:.3f} "
+                  f"[{stats['ci_low']:.3f}, {stats['ci_high']:.3f}]")
+
+    # Save models and results
+    print(f"\n4. SAVING MODELS AND RESULTS")
+    print("-" * 50)
+
+    model_path = os.path.join(args.output_dir, 'best_carbon_model.bin')
+    results_path = os.path.join(args.output_dir, 'model_training_results.json')
+    predictions_path = os.path.join(args.output_dir, 'model_predictions.json')
+    try:
+        # Save best model
+        if best_model and best_model in results:
+            metadata = {
+                'model_name': best_model,
+                'test_r2': best_r2,
+                'feature_importance': feature_importance
+            }
+
+            with profiler.phase('save_model'):
+                save_model(results[best_model]['model'], model_path,
+                           feature_names=[str(name) for name in feature_names], metadata=metadata)
+            print(f"✓ Best model saved to {model_path}")
+
+        print(f"✓ Model predictions saved to {predictions_dir}/")
+        if args.json_predictions:
+            with profiler.phase('export_json_predictions', rows=len(y_train) + len(y_test)):
+                export_json(predictions_dir, predictions_path)
+            print(f"✓ Model predictions exported to {predictions_path}")
+
+        # Save comprehensive results
+        results_summary = {
+            'timestamp': datetime.now().isoformat(),
+            'models_trained': list(results.keys()),
+            'best_model': best_model,
+            'best_test_r2': best_r2,
+            'feature_names': feature_names.tolist() if hasattr(feature_names, 'tolist') else list(feature_names),
+            'data_info': {
+                'train_samples': len(y_train),
+                'test_samples': len(y_test),
+                'n_features': len(feature_names)
+            }
+        }
+
+        # Add metrics for each model
+        for name, result in results.items():
+            results_summary[f'{name}_metrics'] = {
+                'train_r2': float(result['train_metrics']['R2']),
+                'test_r2': float(result['test_metrics']['R2']),
+                'test_rmse': float(result['test_metrics']['RMSE']),
+                'test_mae': float(result['test_metrics']['MAE']),
+                **result['timing']
+            }
+
+        # Everything up to this write is profiled; the write itself is not
+        profiler.stop()
+        results_summary['profile'] = profiler.report()
+        write_json(results_summary, results_path)
+        print(f"✓ Training results saved to {results_path}")
+        if args.profile:
+            print(f"✓ Profile ({args.profile}) saved to {profile_path}")
+
+    except Exception as e:
+        profiler.stop()
+        print(f"Error saving results: {e}")
+
+    print(f"\n" + "="*60)
+    print("MODEL TRAINING COMPLETE")
+    print("="*60)
+    print(f"✓ Trained {len(results)} models successfully")
+    print(f"✓ Best model: {best_model} (R² = {best_r2:.3f})")
+    print(f"✓ Models and results saved to {args.output_dir}/")
+    print(f"\nFiles created:")
+    print("- best_carbon_model.bin (trained model, see carbon_models/artifact.py)")
+    print("- model_training_results.json (comprehensive results)")
+    print("- model_predictions/ (all predictions, one .npy per column; see carbon_models/columnar.py)")
+    if args.json_predictions:
+        print("- model_predictions.json (all predictions as JSON)")
+    print("\nReady for model evaluation and deployment!")
+
+
+def evaluate(args):
+    from carbon_models.artifact import load_model
+    from carbon_models.data_io import dict_to_array
+    from carbon_models.metrics import calculate_metrics
+
+    print("=== CARBON MODEL EVALUATION ===\n")
+    model = load_model(args.artifact)
+    X_train, y_train, X_test, y_test, feature_names = _load_data(args.data)
+    feature_names = model.feature_names or list(feature_names)
+
+    print(f"\n{'Split':<8} {'R²':<8} {'RMSE':<10} {'MAE':<10}")
+    print("-" * 36)
+    for split, X, y in (('train', X_train, y_train), ('test', X_test, y_test)):
+        metrics = calculate_metrics(y, model.predict(dict_to_array(X, feature_names)))
+        print(f"{split:<8} {metrics['R2']:<8.3f} {metrics['RMSE']:<10.3f} {metrics['MAE']:<10.3f}")
+
+
+def cv(args):
+    import time
+
+    import numpy as np
+
+    from carbon_models.cross_validation import (cross_validate, kfold_assignment,
+                                                spatial_block_assignment, summarize)
+    from carbon_models.data_io import dict_to_array, write_json
+
+    print("=== CARBON MODEL CROSS-VALIDATION ===\n")
+    X_train, y_train, _, _, feature_names = _load_data(args.data)
+    X = dict_to_array(X_train, feature_names)
+
+    if args.coordinates:
+        coordinates = np.load(args.coordinates)
+        if len(coordinates) != len(y_train):
+            raise SystemExit(f"{args.coordinates} has {len(coordinates)} rows, training data {len(y_train)}")
+        folds = spatial_block_assignment(coordinates, args.block_size, args.folds, args.seed)
+        print(f"Spatially blocked {args.folds}-fold CV (block size {args.block_size:g})")
+    else:
+        folds = kfold_assignment(len(y_train), args.folds, random_state=args.seed)
+        print(f"{args.folds}-fold CV")
+
+    start = time.perf_counter()
+    # Folds already run in parallel with --n-jobs, so each forest builds its trees in one process
+    models = _default_models(args.splitter, n_jobs=1, seed=args.seed)
+    results = cross_validate(models, X, y_train, folds, n_jobs=args.n_jobs, random_state=args.seed)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'Model':<20} {'Fold':<6} {'R²':<8} {'RMSE':<10} {'MAE':<10} {'Fit (s)':<8}")
+    print("-" * 62)
+    for row in results:
+        print(f"{row['model']:<20} {row['fold']:<6} {row['R2']:<8.3f} {row['RMSE']:<10.3f} "
+              f"{row['MAE']:<10.3f} {row['fit_seconds']:<8.2f}")
+
+    summary = summarize(results)
+    print(f"\n{'Model':<20} {'Mean R²':<16} {'Mean RMSE':<16}")
+    print("-" * 52)
+    for name, stats in summary.items():
+        print(f"{name:<20} {stats['R2_mean']:.3f} ± {stats['R2_std']:<8.3f} "
+              f"{stats['RMSE_mean']:.3f} ± {stats['RMSE_std']:.3f}")
+    best_model = max(summary, key=lambda name: summary[name]['R2_mean'])
+    total_fit = sum(row['fit_seconds'] for row in results)
+    print(f"\nBest model by mean CV R²: {best_model}")
+    print(f"Wall clock {elapsed:.2f}s for {total_fit:.2f}s of fitting "
+          f"(slowest fit {max(row['fit_seconds'] for row in results):.2f}s)")
+
+    if args.output:
+        write_json({'folds': args.folds, 'spatial_block_size': args.block_size if args.coordinates else None,
+                    'best_model': best_model, 'summary': summary, 'results': results}, args.output)
+        print(f"✓ Cross-validation results saved to {args.output}")
+
+
+def search(args):
+    import time
+
+    import numpy as np
+
+    from carbon_models.data_io import dict_to_array, write_json
+    from carbon_models.metrics import calculate_metrics
+    from carbon_models.search import SEARCH_SPACES, HyperbandSearch
+
+    print("=== CARBON MODEL HYPERPARAMETER SEARCH ===\n")
+    X_train, y_train, X_test, y_test, feature_names = _load_data(args.data)
+    X = dict_to_array(X_train, feature_names)
+
+    # Hold out part of the training split for validation; the test split stays untouched
+    order = np.random.default_rng(args.seed).permutation(len(y_train))
+    n_val = int(len(order) * args.validation_fraction)
+    val, fit_rows = order[:n_val], order[n_val:]
+
+    spaces = {name: space for name, space in SEARCH_SPACES.items()
+              if args.models is None or name in args.models}
+    searcher = HyperbandSearch(spaces, eta=args.eta, min_budget=args.min_budget, resource=args.resource,
+                               n_jobs=args.n_jobs, log_path=args.log, random_state=args.seed)
+    start = time.perf_counter()
+    class_name, params, score = searcher.fit(X[fit_rows], y_train[fit_rows], X[val], y_train[val])
+    elapsed = time.perf_counter() - start
+
+    trial_cost = sum(trial['fit_seconds'] + trial['predict_seconds'] for trial in searcher.trials)
+    print(f"\n{len(searcher.trials)} trials ({trial_cost:.1f}s of training and scoring) in {elapsed:.1f}s")
+    if args.log:
+        print(f"Trial log: {args.log}")
+        if searcher.stale_trials:
+            print(f"Ignored {searcher.stale_trials} logged trials from other data, seed or validation split")
+
+    print(f"\n{'Model':<24} {'Budget':<8} {'Val R²':<8} {'Cost (s)':<9} Params")
+    print("-" * 80)
+    for trial in sorted(searcher.trials, key=lambda t: -t['score'])[:10]:
+        print(f"{trial['model']:<24} {trial['budget']:<8.3f} {trial['score']:<8.3f} "
+              f"{trial['fit_seconds'] + trial['predict_seconds']:<9.2f} {trial['params']}")
+
+    best = searcher.best_model()
+    with contextlib.redirect_stdout(io.StringIO()):
+        best.fit(X, y_train)
+    test_metrics = calculate_metrics(y_test, best.predict(dict_to_array(X_test, feature_names)))
+    print(f"\nBest: {class_name} {params} (validation R² = {score:.3f}, test R² = {test_metrics['R2']:.3f})")
+
+    if args.output:
+        write_json({'model': class_name, 'params': params, 'validation_r2': score,
+                    'test_r2': float(test_metrics['R2']), 'resource': args.resource}, args.output)
+        print(f"✓ Best configuration saved to {args.output}")
+
+
+def predict(args):
+    from carbon_models.artifact import load_model
+    from carbon_models.data_io import read_features, write_predictions
+
+    model = load_model(args.artifact)
+    predictions = model.predict(read_features(args.features, model.feature_names))
+    if args.output:
+        write_predictions(predictions, args.output)
+        print(f"✓ {len(predictions):,} predictions saved to {args.output}")
+    else:
+        print('\n'.join(f"{value:.6f}" for value in predictions.tolist()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='carbon_models', description="Carbon stock estimation models")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = subcommands.add_parser('train', help="train and compare all models, save the best")
+    train_parser.add_argument('--data', default=DEFAULT_DATA_FILE)
+    train_parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    train_parser.add_argument('--json-predictions', action='store_true',
+                              help="also export all predictions as model_predictions.json")
+    train_parser.add_argument('--splitter', choices=['random', 'exact'], default='random',
+                              help="random forest split search: one random threshold per feature "
+                                   "(the original behaviour) or the best threshold by a sorted scan")
+    train_parser.add_argument('--seed', type=int, default=None,
+                              help="seed the global NumPy random state before each fit, and the forest")
+    train_parser.add_argument('--n-jobs', type=int, default=1,
+                              help="processes building random forest trees (-1: one per CPU)")
+    train_parser.add_argument('--cache-dir', default=None,
+                              help="reuse fitted models from this cache when data, parameters and seed match")
+    train_parser.add_argument('--cache-max-mb', type=float, default=1024,
+                              help="cache size cap; least recently used models are evicted beyond it")
+    train_parser.add_argument('--trace-memory', action='store_true',
+                              help="record each phase's peak Python/NumPy allocation with tracemalloc")
+    train_parser.add_argument('--profile', choices=['cprofile', 'sample'], default=None,
+                              help="also dump a cProfile (pstats) or sampled collapsed-stack profile")
+    train_parser.add_argument('--profile-output', default=None,
+                              help="profile dump path (default: train_profile.* in --output-dir)")
+    train_parser.set_defaults(handler=train)
+
+    evaluate_parser = subcommands.add_parser('evaluate', help="score a saved model on the train/test split")
+    evaluate_parser.add_argument('artifact')
+    evaluate_parser.add_argument('--data', default=DEFAULT_DATA_FILE)
+    evaluate_parser.set_defaults(handler=evaluate)
+
+    cv_parser = subcommands.add_parser('cv', help="k-fold or spatially blocked cross-validation of all models")
+    cv_parser.add_argument('--data', default=DEFAULT_DATA_FILE)
+    cv_parser.add_argument('--folds', type=int, default=5)
+    cv_parser.add_argument('--coordinates', default=None,
+                           help=".npy of (x, y) per training sample for spatially blocked folds")
+    cv_parser.add_argument('--block-size', type=float, default=1000.0)
+    cv_parser.add_argument('--splitter', choices=['random', 'exact'], default='random',
+                           help="random forest split search (see train --help)")
+    cv_parser.add_argument('--seed', type=int, default=0)
+    cv_parser.add_argument('--n-jobs', type=int, default=-1)
+    cv_parser.add_argument('--output', default=None)
+    cv_parser.set_defaults(handler=cv)
+
+    search_parser = subcommands.add_parser('search', help="Hyperband search over model hyperparameters")
+    search_parser.add_argument('--data', default=DEFAULT_DATA_FILE)
+    search_parser.add_argument('--models', nargs='+', default=None,
+                               choices=['SimpleRandomForest', 'SimpleGradientBoosting', 'SimpleNeuralNetwork'])
+    search_parser.add_argument('--eta', type=int, default=3)
+    search_parser.add_argument('--min-budget', type=float, default=1/27)
+    search_parser.add_argument('--resource', choices=['auto', 'samples'], default='auto',
+                               help="budget as trees/rounds/epochs (auto) or training-sample fraction")
+    search_parser.add_argument('--validation-fraction', type=float, default=0.2)
+    search_parser.add_argument('--log', default='search_trials.jsonl',
+                               help="JSON-lines trial log; trials logged for the same data and seed are reused")
+    search_parser.add_argument('--seed', type=int, default=0)
+    search_parser.add_argument('--n-jobs', type=int, default=-1)
+    search_parser.add_argument('--output', default=None)
+    search_parser.set_defaults(handler=search)
+
+    predict_parser = subcommands.add_parser('predict', help="predict from a .npy or CSV feature table")
+    predict_parser.add_argument('artifact')
+    predict_parser.add_argument('features')
+    predict_parser.add_argument('--output', default=None, help=".npy or CSV; prints to stdout if omitted")
+    predict_parser.set_defaults(handler=predict)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
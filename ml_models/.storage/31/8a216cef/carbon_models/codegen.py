@@ -0,0 +1,259 @@
+"""
+Generated Single-Row Predictors
+===============================
+
+Compiles a trained model into plain Python source with one function,
+
+    predict_row(x) -> float        # x: sequence of feature values in model order
+
+for scoring one row at a time without NumPy call overhead. Forest trees
+become nested if/else statements on constant thresholds and leaf values,
+with no dict or array access; the per-tree values are summed in the same
+pairwise order as SimpleRandomForest.predict(), so the result is
+bit-identical to it. Linear regression and gradient boosting (a sum of
+linear stages) become a single expression bias + w0 * x0 + ...
+
+The source is cached next to the model artifact (ARTIFACT -> ARTIFACT stem
++ '_predictor.py', with Python's own bytecode cache alongside) and carries
+the artifact's SHA-256, so a changed artifact is recompiled. Before the
+cache is written, the generated predictor is checked against the model's
+predict() on rows built around the model's split thresholds.
+
+    python -m carbon_models.codegen ARTIFACT [--rows 2000]
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib.util
+import math
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from carbon_models.artifact import linear_coefficients, load_model
+
+# Bump when the generated code changes, so cached predictors are regenerated
+CODEGEN_VERSION = 1
+
+# Python rejects deeper indentation than this; leave room for the function body
+_MAX_TREE_DEPTH = 90
+
+
+def _literal(value):
+    value = float(value)
+    return repr(value) if math.isfinite(value) else f"float('{value}')"
+
+
+def _emit_tree(flat, node, target, lines, indent):
+    """Nested if/else for the subtree at node, assigning its leaf value to target"""
+    pad = '    ' * indent
+    if flat['left'][node] == node:
+        lines.append(f"{pad}{target} = {_literal(flat['value'][node])}")
+        return
+    lines.append(f"{pad}if x{int(flat['feature'][node])} <= {_literal(flat['threshold'][node])}:")
+    _emit_tree(flat, int(flat['left'][node]), target, lines, indent + 1)
+    lines.append(f"{pad}else:")
+    _emit_tree(flat, int(flat['right'][node]), target, lines, indent + 1)
+
+
+def _sum_expression(start, stop):
+    """Sum of t{start}..t{stop-1} in the order of SimpleRandomForest._sum_trees"""
+    n = stop - start
+    if n < 8:
+        return ' + '.join(['0.0'] + [f"t{t}" for t in range(start, stop)])
+    if n <= 128:
+        lanes = [[start + j] for j in range(8)]
+        t = start + 8
+        while t < stop - n % 8:
+            for j in range(8):
+                lanes[j].append(t + j)
+            t += 8
+        lane = [' + '.join(f"t{i}" for i in terms) for terms in lanes]
+        total = (f"((({lane[0]}) + ({lane[1]})) + (({lane[2]}) + ({lane[3]}))) + "
+                 f"((({lane[4]}) + ({lane[5]})) + (({lane[6]}) + ({lane[7]})))")
+        return ' + '.join([f"({total})"] + [f"t{i}" for i in range(t, stop)])
+    half = n // 2
+    half -= half % 8
+    return f"({_sum_expression(start, start + half)}) + ({_sum_expression(start + half, stop)})"
+
+
+def _forest_body(model):
+    if getattr(model, 'flat_trees', None) is None:
+        model._compile_trees()
+    flat = {name: np.asarray(values) for name, values in model.flat_trees.items()}
+    n_trees = len(flat['roots'])
+    if n_trees and int(flat['depths'].max()) > _MAX_TREE_DEPTH:
+        raise ValueError(f"trees deeper than {_MAX_TREE_DEPTH} cannot be compiled to nested if/else")
+
+    # Only features that some split uses are read from the row
+    is_split = flat['left'] != np.arange(len(flat['left']))
+    lines = [f"    x{j} = x[{j}]" for j in sorted(set(flat['feature'][is_split].tolist()))]
+    for t in range(n_trees):
+        _emit_tree(flat, int(flat['roots'][t]), f"t{t}", lines, 1)
+    lines.append(f"    return ({_sum_expression(0, n_trees)}) / {n_trees}")
+    return lines
+
+
+def _linear_body(model):
+    bias, weights = linear_coefficients(model)
+    terms = [_literal(bias)] + [f"{_literal(w)} * x[{j}]" for j, w in enumerate(weights)]
+    return [f"    return {' + '.join(terms)}"]
+
+
+_GENERATORS = {
+    'SimpleRandomForest': _forest_body,
+    'SimpleLinearRegression': _linear_body,
+    'SimpleGradientBoosting': _linear_body
+}
+
+
+def generate_source(model, artifact_sha256=None):
+    """Python source of a module defining predict_row(x) for model"""
+    class_name = type(model).__name__
+    if class_name not in _GENERATORS:
+        raise TypeError(f"No predictor code generator for {class_name}")
+    lines = [
+        f'"""Generated by carbon_models.codegen from a {class_name}; do not edit."""',
+        "",
+        f"CODEGEN_VERSION = {CODEGEN_VERSION}",
+        f"MODEL_CLASS = {class_name!r}",
+        f"ARTIFACT_SHA256 = {artifact_sha256!r}",
+        "",
+        "",
+        "def predict_row(x):"
+    ]
+    lines += _GENERATORS[class_name](model)
+    return '\n'.join(lines) + '\n'
+
+
+def _check_rows(model, n_rows, random_state):
+    """Rows that exercise every split: thresholds, their next float up, and values between"""
+    rng = np.random.default_rng(random_state)
+    if type(model).__name__ == 'SimpleRandomForest':
+        flat = model.flat_trees
+        is_split = np.asarray(flat['left']) != np.arange(len(flat['left']))
+        features = np.asarray(flat['feature'])[is_split]
+        thresholds = np.asarray(flat['threshold'])[is_split]
+        n_features = int(features.max()) + 1 if len(features) else 1
+        X = rng.normal(size=(n_rows, n_features))
+        for j in range(n_features):
+            values = thresholds[features == j]
+            if len(values):
+                candidates = np.concatenate([values, np.nextafter(values, np.inf),
+                                             rng.uniform(values.min() - 1, values.max() + 1, len(values))])
+                X[:, j] = rng.choice(candidates, n_rows)
+        return X
+    n_features = len(linear_coefficients(model)[1])
+    return rng.normal(scale=100.0, size=(n_rows, n_features))
+
+
+def verify(predict_row, model, n_rows=1000, random_state=0, X=None):
+    """Raise ValueError unless predict_row matches model.predict() on n_rows rows.
+
+    Forests must match exactly; linear models to within 1e-9 relative, as the
+    generated expression sums in a different order from the matrix product.
+    """
+    if X is None:
+        X = _check_rows(model, n_rows, random_state)
+        if type(model).__name__ != 'SimpleRandomForest':
+            X = X[:, :len(linear_coefficients(model)[1])]
+    expected = model.predict(X)
+    generated = np.array([predict_row(row) for row in X.tolist()])
+    if type(model).__name__ == 'SimpleRandomForest':
+        mismatched = np.flatnonzero(generated != expected)
+    else:
+        mismatched = np.flatnonzero(~np.isclose(generated, expected, rtol=1e-9, atol=1e-9))
+    if len(mismatched):
+        i = mismatched[0]
+        raise ValueError(f"generated predictor disagrees with predict() on {len(mismatched)} of "
+                         f"{len(X)} rows, e.g. row {i}: {generated[i]!r} != {expected[i]!r}")
+
+
+def compiled_path(artifact_path):
+    stem, _ = os.path.splitext(artifact_path)
+    return f"{stem}_predictor.py"
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _import_source(path):
+    name = 'carbon_predictor_' + hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_predictor(artifact_path, n_check_rows=1000):
+    """predict_row for an artifact, generating and verifying it on first use.
+
+    A cached predictor is reused while its recorded artifact digest and
+    codegen version match; otherwise it is regenerated, verified against
+    the artifact's model and written atomically next to the artifact.
+    """
+    path = compiled_path(artifact_path)
+    digest = _file_sha256(artifact_path)
+    if os.path.exists(path):
+        with contextlib.suppress(SyntaxError, ImportError, OSError):
+            module = _import_source(path)
+            if (getattr(module, 'ARTIFACT_SHA256', None) == digest and
+                    getattr(module, 'CODEGEN_VERSION', None) == CODEGEN_VERSION):
+                return module.predict_row
+
+    model = load_model(artifact_path)
+    source = generate_source(model, artifact_sha256=digest)
+    namespace = {}
+    exec(compile(source, path, 'exec'), namespace)
+    verify(namespace['predict_row'], model, n_rows=n_check_rows)
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(source)
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+    return _import_source(path).predict_row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a model artifact to a single-row Python predictor")
+    parser.add_argument('artifact')
+    parser.add_argument('--rows', type=int, default=2000, help="single-row calls to time")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    predict_row = load_predictor(args.artifact)
+    print(f"✓ Predictor ready at {compiled_path(args.artifact)} ({time.perf_counter() - start:.2f}s)")
+
+    model = load_model(args.artifact)
+    X = _check_rows(model, args.rows, random_state=1)
+    if type(model).__name__ != 'SimpleRandomForest':
+        X = X[:, :len(linear_coefficients(model)[1])]
+    rows = X.tolist()
+    timings = {'generated predict_row': [], 'model.predict, one row': []}
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        predict_row(row)
+        timings['generated predict_row'].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        model.predict(X[i:i + 1])
+        timings['model.predict, one row'].append(time.perf_counter() - start)
+    for name, values in timings.items():
+        p50, p99 = np.percentile(values, [50, 99]) * 1e6
+        print(f"{name:<24} p50 {p50:9.1f} us   p99 {p99:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
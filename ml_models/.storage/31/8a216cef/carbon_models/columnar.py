@@ -0,0 +1,130 @@
+"""
+Columnar Binary Output
+======================
+
+A directory of named 1-D columns, one standard .npy file per column, plus a
+small manifest.json:
+
+    {"format": "carbon-columns", "version": 1,
+     "columns": {"NAME": {"file": "NAME.npy", "dtype": "<f8", "length": N}, ...},
+     "metadata": {...}}
+
+ColumnarWriter streams chunks straight to the column files, so a column never
+has to be held in memory, and fixes up each file's .npy header with the
+final length on close. open_columns() memory-maps every column read-only;
+export_json() writes the columns as a JSON object of lists for tools that
+need it, again one chunk at a time.
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+
+FORMAT = 'carbon-columns'
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+
+# Reserved .npy header size: room for any 1-D shape, a multiple of 64 bytes
+_HEADER_SIZE = 128
+
+
+def _npy_header(dtype, length):
+    """A version 1.0 .npy header of exactly _HEADER_SIZE bytes"""
+    header = repr({'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                   'fortran_order': False, 'shape': (length,)})
+    header = header.encode('latin1')
+    prefix = b'\x93NUMPY\x01\x00'
+    padding = _HEADER_SIZE - len(prefix) - 2 - len(header) - 1
+    return prefix + (_HEADER_SIZE - len(prefix) - 2).to_bytes(2, 'little') + header + b' ' * padding + b'\n'
+
+
+def _file_name(name, taken):
+    stem = re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or 'column'
+    file_name = f"{stem}.npy"
+    suffix = 1
+    while file_name in taken:
+        suffix += 1
+        file_name = f"{stem}_{suffix}.npy"
+    return file_name
+
+
+class ColumnarWriter:
+    """Streams named columns into a columnar directory; use as a context manager"""
+
+    def __init__(self, directory, dtype=np.float64, metadata=None):
+        self.directory = directory
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self.metadata = metadata or {}
+        self._files = {}
+        self._columns = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, name, values):
+        """Append a chunk of values to column name, creating it on first use"""
+        if name not in self._columns:
+            file_name = _file_name(name, {c['file'] for c in self._columns.values()})
+            f = open(os.path.join(self.directory, file_name), 'wb')
+            f.write(_npy_header(self.dtype, 0))
+            self._files[name] = f
+            self._columns[name] = {'file': file_name, 'dtype': self.dtype.str, 'length': 0}
+        chunk = np.ascontiguousarray(values, dtype=self.dtype).ravel()
+        self._files[name].write(chunk.tobytes())
+        self._columns[name]['length'] += len(chunk)
+
+    def write(self, columns):
+        """Append one chunk to each column of a {name: values} dict"""
+        for name, values in columns.items():
+            self.append(name, values)
+
+    def close(self):
+        for name, f in self._files.items():
+            f.seek(0)
+            f.write(_npy_header(self.dtype, self._columns[name]['length']))
+            f.close()
+        self._files = {}
+        manifest = {'format': FORMAT, 'version': FORMAT_VERSION,
+                    'columns': self._columns, 'metadata': self.metadata}
+        with open(os.path.join(self.directory, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT:
+        raise ValueError(f"{directory} is not a {FORMAT} directory")
+    if manifest['version'] > FORMAT_VERSION:
+        raise ValueError(f"{directory} uses format version {manifest['version']}; "
+                         f"this reader supports up to {FORMAT_VERSION}")
+    return manifest
+
+
+def open_columns(directory, names=None):
+    """{name: read-only memory-mapped column} for names (all columns by default)"""
+    manifest = read_manifest(directory)
+    columns = manifest['columns']
+    names = list(columns) if names is None else names
+    return {name: np.load(os.path.join(directory, columns[name]['file']), mmap_mode='r')
+            for name in names}
+
+
+def export_json(directory, path, chunk_size=65536):
+    """Write every column as a JSON object {name: [values, ...]}, chunk by chunk"""
+    columns = open_columns(directory)
+    with open(path, 'w') as f:
+        f.write('{')
+        for i, (name, column) in enumerate(columns.items()):
+            f.write(f'{"," if i else ""}\n  {json.dumps(name)}: [')
+            for start in range(0, len(column), chunk_size):
+                values = column[start:start + chunk_size].tolist()
+                f.write((', ' if start else '') + ', '.join(map(json.dumps, values)))
+            f.write(']')
+        f.write('\n}\n')
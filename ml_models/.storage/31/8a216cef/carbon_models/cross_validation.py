@@ -0,0 +1,130 @@
+"""
+Cross-Validation
+================
+
+k-fold and spatially blocked cross-validation for the carbon models.
+
+Folds are described by an assignment array giving each sample's fold. With
+spatial blocking, samples are first grouped into square blocks of their
+coordinates and whole blocks are assigned to folds, so test samples are not
+surrounded by near-identical training neighbours.
+
+cross_validate() trains every fold x model combination as an independent
+task in a process pool. X, y and the fold assignment are placed in shared
+memory once; workers map them read-only and slice their training and test
+rows from the mapping, so no task receives a copy of the feature matrix.
+With enough cores the wall-clock time approaches that of the slowest single
+fit rather than the sum of all fits.
+"""
+
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from carbon_models.metrics import calculate_metrics
+from carbon_models.models import clone
+from carbon_models.shared_arrays import attach_arrays, pool_size, shared_pool
+
+
+def kfold_assignment(n_samples, n_folds=5, shuffle=True, random_state=0):
+    """Fold index (0..n_folds-1) for each sample, in near-equal folds"""
+    order = np.random.default_rng(random_state).permutation(n_samples) if shuffle else np.arange(n_samples)
+    folds = np.empty(n_samples, dtype=np.int32)
+    for fold, members in enumerate(np.array_split(order, n_folds)):
+        folds[members] = fold
+    return folds
+
+
+def spatial_block_assignment(coordinates, block_size, n_folds=5, random_state=0):
+    """Fold index for each sample, assigning whole coordinate blocks to folds.
+
+    coordinates is (n_samples, 2), in the same units as block_size. Blocks
+    are dealt out largest first to the fold with the fewest samples so far,
+    with ties between equal-sized blocks broken randomly.
+    """
+    cells = np.floor(np.asarray(coordinates, dtype=np.float64) / block_size).astype(np.int64)
+    _, block_of, block_sizes = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    block_of = block_of.ravel()
+    if len(block_sizes) < n_folds:
+        raise ValueError(f"only {len(block_sizes)} spatial blocks for {n_folds} folds; use a smaller block_size")
+
+    shuffled = np.random.default_rng(random_state).permutation(len(block_sizes))
+    order = shuffled[np.argsort(-block_sizes[shuffled], kind='stable')]
+    fold_of_block = np.empty(len(block_sizes), dtype=np.int32)
+    fold_sizes = np.zeros(n_folds, dtype=np.int64)
+    for block in order:
+        fold = int(np.argmin(fold_sizes))
+        fold_of_block[block] = fold
+        fold_sizes[fold] += block_sizes[block]
+    return fold_of_block[block_of]
+
+
+def _run_fold(models, X, y, folds, random_state, model_index, fold):
+    """Fit one model on all folds but one and score it on the held-out fold"""
+    test = folds == fold
+    model = clone(models[model_index])
+    # Models without their own random_state draw from the global state; a
+    # per-task seed keeps results independent of which worker runs the task
+    np.random.seed(np.random.SeedSequence([random_state, model_index, fold]).generate_state(1)[0])
+    start = time.perf_counter()
+    # Keep per-epoch training logs out of the CV report
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.fit(X[~test], y[~test])
+    fit_seconds = time.perf_counter() - start
+    metrics = calculate_metrics(y[test], model.predict(X[test]))
+    return {
+        'model': model.name,
+        'fold': int(fold),
+        'train_samples': int(len(y) - np.count_nonzero(test)),
+        'test_samples': int(np.count_nonzero(test)),
+        'fit_seconds': fit_seconds,
+        **{name: float(value) for name, value in metrics.items()}
+    }
+
+
+# Per-process state set up by _init_cv_worker
+_cv_state = {}
+
+def _init_cv_worker(handle, models, random_state):
+    X, y, folds = attach_arrays(handle)
+    _cv_state.update(X=X, y=y, folds=folds, models=models, random_state=random_state)
+
+def _run_fold_in_worker(model_index, fold):
+    state = _cv_state
+    return _run_fold(state['models'], state['X'], state['y'], state['folds'],
+                     state['random_state'], model_index, fold)
+
+
+def cross_validate(models, X, y, folds, n_jobs=-1, random_state=0):
+    """Per-fold metrics for every model, as a list of dicts ordered by model then fold.
+
+    models are unfitted prototypes; each task fits a fresh clone. folds is a
+    fold assignment array (see kfold_assignment / spatial_block_assignment).
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    folds = np.asarray(folds)
+    tasks = [(i, int(fold)) for i in range(len(models)) for fold in np.unique(folds)]
+
+    n_workers = pool_size(n_jobs, len(tasks))
+    if n_workers == 1:
+        return [_run_fold(models, X, y, folds, random_state, i, fold) for i, fold in tasks]
+
+    with shared_pool((X, y, folds), n_workers, _init_cv_worker, (models, random_state)) as executor:
+        futures = [executor.submit(_run_fold_in_worker, i, fold) for i, fold in tasks]
+        return [future.result() for future in futures]
+
+
+def summarize(results, metrics=('R2', 'RMSE', 'MAE', 'fit_seconds')):
+    """Mean and standard deviation across folds of each metric, per model"""
+    summary = {}
+    for name in dict.fromkeys(result['model'] for result in results):
+        rows = [result for result in results if result['model'] == name]
+        summary[name] = {'folds': len(rows)}
+        for metric in metrics:
+            values = np.array([row[metric] for row in rows])
+            summary[name][f'{metric}_mean'] = float(values.mean())
+            summary[name][f'{metric}_std'] = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+    return summary
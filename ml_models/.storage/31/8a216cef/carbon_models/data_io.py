@@ -0,0 +1,100 @@
+"""
+Carbon Data I/O
+===============
+
+Loading training data, reading feature tables for prediction, and writing
+predictions and results.
+
+Training data is a dataset directory (see carbon_models.dataset), or a
+legacy pickled .npz of feature dicts.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from carbon_models.dataset import Dataset, SplitFeatures, is_dataset
+
+def dict_to_array(data_dict, feature_names):
+    """Convert dictionary of features to 2D array"""
+    if isinstance(data_dict, SplitFeatures):
+        # Memory-mapped split: a zero-copy view where the stored layout allows
+        return data_dict.array(feature_names)
+    return np.column_stack([data_dict[name] for name in feature_names])
+
+
+def load_training_data(data_file):
+    """(X_train, y_train, X_test, y_test, feature_names) from a dataset directory or .npz.
+
+    X_train and X_test map feature name to column. For a dataset directory
+    they are lazy views: only the columns used are read, when used.
+    """
+    if os.path.isdir(data_file) and is_dataset(data_file):
+        dataset = Dataset(data_file)
+        return (dataset.features('train'), dataset.target('train'),
+                dataset.features('test'), dataset.target('test'), dataset.selected)
+    loaded_data = np.load(data_file, allow_pickle=True)
+    return (loaded_data['X_train'].item(), loaded_data['y_train'],
+            loaded_data['X_test'].item(), loaded_data['y_test'],
+            loaded_data['feature_names_selected'])
+
+
+def synthetic_training_data(n_samples=1000, seed=42):
+    """Synthetic stand-in for load_training_data, with the same return layout"""
+    np.random.seed(seed)
+
+    # Basic features
+    ndvi = np.random.beta(2, 2, n_samples) * 0.8 + 0.1
+    canopy = np.random.beta(1.5, 1.5, n_samples) * 100
+    soil_carbon = np.random.gamma(2, 1.5, n_samples) + 0.5
+
+    # Target variable
+    y_all = (ndvi * 30 + canopy * 0.2 + soil_carbon * 8 +
+             np.random.normal(0, 5, n_samples))
+    y_all = np.clip(y_all, 0, 100)
+
+    # Split data
+    split_idx = int(0.8 * n_samples)
+    X_train = {
+        'NDVI': ndvi[:split_idx],
+        'Canopy_Cover_Percent': canopy[:split_idx],
+        'Soil_Carbon_Percent': soil_carbon[:split_idx]
+    }
+    X_test = {
+        'NDVI': ndvi[split_idx:],
+        'Canopy_Cover_Percent': canopy[split_idx:],
+        'Soil_Carbon_Percent': soil_carbon[split_idx:]
+    }
+    return X_train, y_all[:split_idx], X_test, y_all[split_idx:], list(X_train.keys())
+
+
+def read_features(path, feature_names=None):
+    """Feature matrix from a .npy (columns in model order) or a CSV with a header row.
+
+    CSV columns are matched to feature_names by name, so their order does not matter.
+    """
+    if str(path).endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    with open(path) as f:
+        header = [name.strip() for name in f.readline().split(',')]
+    table = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+    if feature_names is None:
+        return table
+    missing = [name for name in feature_names if name not in header]
+    if missing:
+        raise ValueError(f"{path} is missing feature columns {missing}")
+    return table[:, [header.index(name) for name in feature_names]]
+
+
+def write_predictions(predictions, path):
+    """Write predictions as .npy, or as a one-column CSV for any other extension"""
+    if str(path).endswith('.npy'):
+        np.save(path, predictions)
+    else:
+        np.savetxt(path, predictions, header='prediction', comments='', fmt='%.6f')
+
+
+def write_json(data, path):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
@@ -0,0 +1,226 @@
+"""
+Columnar Training Datasets
+==========================
+
+A dataset directory replacing the pickled .npz of feature dicts:
+
+    manifest.json            feature names, dtypes and locations, the selected
+                             features, the target and the split row ranges
+    features_<dtype>.npy     (n_features, n_rows) array per feature dtype; row
+                             r is one feature's values over all samples
+    target.npy               (n_rows,) target values
+
+Samples are stored split by split, so each split is a contiguous row range
+and every feature of a split is a contiguous slice of one memory-mapped
+file. Nothing is read until it is used, and only the requested features are
+touched.
+
+Dataset.array() returns a (n_samples, n_features) matrix. When the requested
+features are evenly spaced rows of one block file in ascending order (for
+example all features, or the selected ones when they were written first),
+it is a zero-copy strided view of the mapping; otherwise only the
+requested columns are read into a new array.
+
+    python -m carbon_models.dataset convert processed_carbon_data.npz processed_carbon_data
+    python -m carbon_models.dataset info processed_carbon_data
+"""
+
+import argparse
+import json
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+FORMAT = 'carbon-dataset'
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+TARGET_FILE = 'target.npy'
+
+
+def write_dataset(directory, splits, feature_names=None, selected=None, target_name='target'):
+    """Write {split name: (features dict, target)} as a dataset directory.
+
+    feature_names fixes the stored feature order (default: the first split's
+    dict order). selected is the model's feature list, stored first so that
+    it can be served as a zero-copy view.
+    """
+    split_names = list(splits)
+    first = splits[split_names[0]][0]
+    feature_names = list(feature_names if feature_names is not None else first)
+    selected = list(selected) if selected is not None else feature_names
+    missing = [name for name in selected if name not in feature_names]
+    if missing:
+        raise ValueError(f"selected features {missing} are not in feature_names")
+    order = selected + [name for name in feature_names if name not in selected]
+
+    ranges = {}
+    n_rows = 0
+    for name in split_names:
+        n = len(splits[name][1])
+        ranges[name] = [n_rows, n_rows + n]
+        n_rows += n
+
+    # One block file per dtype; a feature's dtype is taken from the first split
+    dtypes = {name: np.asarray(first[name]).dtype.newbyteorder('<') for name in order}
+    blocks = {}
+    for name in order:
+        blocks.setdefault(dtypes[name].str, []).append(name)
+
+    os.makedirs(directory, exist_ok=True)
+    features = {}
+    for dtype, names in blocks.items():
+        file_name = f"features_{np.dtype(dtype).name}.npy"
+        block = np.lib.format.open_memmap(os.path.join(directory, file_name), mode='w+',
+                                          dtype=dtype, shape=(len(names), n_rows))
+        for row, name in enumerate(names):
+            for split in split_names:
+                start, stop = ranges[split]
+                column = np.asarray(splits[split][0][name])
+                if len(column) != stop - start:
+                    raise ValueError(f"feature {name!r} has {len(column)} values in split "
+                                     f"{split!r}, expected {stop - start}")
+                block[row, start:stop] = column
+            features[name] = {'file': file_name, 'row': row, 'dtype': dtype}
+        block.flush()
+        del block
+
+    target = np.lib.format.open_memmap(os.path.join(directory, TARGET_FILE), mode='w+',
+                                       dtype=np.float64, shape=(n_rows,))
+    for split in split_names:
+        start, stop = ranges[split]
+        target[start:stop] = splits[split][1]
+    target.flush()
+    del target
+
+    manifest = {
+        'format': FORMAT,
+        'version': FORMAT_VERSION,
+        'rows': n_rows,
+        'features': {name: features[name] for name in order},
+        'selected': selected,
+        'target': {'name': target_name, 'file': TARGET_FILE},
+        'splits': ranges
+    }
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return directory
+
+
+def convert_npz(npz_path, directory):
+    """Convert a legacy pickled .npz (X_train/X_test dicts) to a dataset directory"""
+    loaded = np.load(npz_path, allow_pickle=True)
+    X_train, X_test = loaded['X_train'].item(), loaded['X_test'].item()
+    return write_dataset(directory, {'train': (X_train, loaded['y_train']),
+                                     'test': (X_test, loaded['y_test'])},
+                         selected=list(loaded['feature_names_selected']))
+
+
+def is_dataset(path):
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+class SplitFeatures(Mapping):
+    """Read-only {feature name: column} view of one split; columns map lazily"""
+
+    def __init__(self, dataset, split):
+        self.dataset = dataset
+        self.split = split
+
+    def __getitem__(self, name):
+        return self.dataset.column(name, self.split)
+
+    def __iter__(self):
+        return iter(self.dataset.feature_names)
+
+    def __len__(self):
+        return len(self.dataset.feature_names)
+
+    def array(self, feature_names=None):
+        return self.dataset.array(self.split, feature_names)
+
+
+class Dataset:
+    """A dataset directory, opened lazily"""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+        if manifest.get('format') != FORMAT:
+            raise ValueError(f"{directory} is not a {FORMAT} directory")
+        if manifest['version'] > FORMAT_VERSION:
+            raise ValueError(f"{directory} uses format version {manifest['version']}; "
+                             f"this reader supports up to {FORMAT_VERSION}")
+        self.directory = directory
+        self.manifest = manifest
+        self.feature_names = list(manifest['features'])
+        self.selected = list(manifest['selected'])
+        self.splits = {name: tuple(rows) for name, rows in manifest['splits'].items()}
+        self._maps = {}
+
+    def _map(self, file_name):
+        if file_name not in self._maps:
+            self._maps[file_name] = np.load(os.path.join(self.directory, file_name), mmap_mode='r')
+        return self._maps[file_name]
+
+    def _rows(self, split):
+        if split is None:
+            return slice(0, self.manifest['rows'])
+        if split not in self.splits:
+            raise KeyError(f"unknown split {split!r}; have {list(self.splits)}")
+        return slice(*self.splits[split])
+
+    def column(self, name, split=None):
+        """One feature's values for a split (all rows by default), memory-mapped"""
+        if name not in self.manifest['features']:
+            raise KeyError(f"unknown feature {name!r}")
+        feature = self.manifest['features'][name]
+        return self._map(feature['file'])[feature['row'], self._rows(split)]
+
+    def target(self, split=None):
+        return self._map(self.manifest['target']['file'])[self._rows(split)]
+
+    def array(self, split=None, feature_names=None):
+        """(n_samples, n_features) matrix of feature_names (default: the selected features)"""
+        feature_names = self.selected if feature_names is None else list(feature_names)
+        rows = self._rows(split)
+        features = [self.manifest['features'][name] for name in feature_names]
+        files = {feature['file'] for feature in features}
+        positions = [feature['row'] for feature in features]
+        steps = set(np.diff(positions).tolist())
+        if len(files) == 1 and (not steps or (len(steps) == 1 and steps.pop() > 0)):
+            # Evenly spaced rows of one block: a strided view, no copy
+            step = positions[1] - positions[0] if len(positions) > 1 else 1
+            block = self._map(files.pop())
+            return block[positions[0]:positions[-1] + 1:step, rows].T
+
+        n_samples = rows.stop - rows.start
+        dtype = np.result_type(*[np.dtype(feature['dtype']) for feature in features])
+        X = np.empty((n_samples, len(feature_names)), dtype=dtype, order='F')
+        for j, name in enumerate(feature_names):
+            X[:, j] = self.column(name, split)
+        return X
+
+    def features(self, split=None):
+        return SplitFeatures(self, split)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar training dataset tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert_parser = subparsers.add_parser('convert', help="convert a pickled .npz to a dataset directory")
+    convert_parser.add_argument('npz')
+    convert_parser.add_argument('directory')
+    info_parser = subparsers.add_parser('info', help="print a dataset's manifest")
+    info_parser.add_argument('directory')
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        convert_npz(args.npz, args.directory)
+        print(f"✓ {args.npz} converted to {args.directory}/")
+    else:
+        print(json.dumps(Dataset(args.directory).manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Permutation Feature Importance
+==============================
+
+Model-based importance: how much the trained model's R² drops when one
+feature's values are shuffled across rows, breaking its link to the target.
+
+The baseline predictions are computed once. Copies of X are stacked into
+one buffer of at most batch_bytes; each copy has one column permuted for a
+(feature, repeat) pair, and the whole stack is scored with a single
+predict() call. Copies are written once and only the permuted column is
+restored between batches, so the cost is a few large vectorized predict
+calls rather than one per feature and repeat plus a copy of X for each.
+Feature groups can also be spread over a process pool that maps X and y from
+shared memory.
+
+Each (feature, repeat) permutation comes from its own seed, so results do not
+depend on batching or n_jobs. Repeats give a mean drop, its standard
+deviation and a normal-approximation confidence interval for the mean.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+
+from carbon_models.shared_arrays import attach_arrays, pool_size, shared_pool
+
+
+def _permutation(random_state, feature, repeat, n_rows):
+    return np.random.default_rng([random_state, feature, repeat]).permutation(n_rows)
+
+
+def _score_drops(model, X, y, baseline_sse, ss_tot, features, n_repeats, random_state, batch_bytes):
+    """R² drop for every (feature, repeat) pair, shape (len(features), n_repeats)"""
+    n_rows, n_features = X.shape
+    pairs = [(i, feature, repeat) for i, feature in enumerate(features) for repeat in range(n_repeats)]
+    per_batch = max(1, batch_bytes // (8 * X.size))
+    n_blocks = min(per_batch, len(pairs))
+    # Each block holds a full copy of X once; a permutation then only rewrites
+    # one column and restores it afterwards
+    stacked = np.tile(X, (n_blocks, 1))
+    blocks = stacked.reshape(n_blocks, n_rows, n_features)
+    drops = np.empty((len(features), n_repeats))
+
+    for start in range(0, len(pairs), per_batch):
+        batch = pairs[start:start + per_batch]
+        for block, (_, feature, repeat) in zip(blocks, batch):
+            block[:, feature] = X[_permutation(random_state, feature, repeat, n_rows), feature]
+        predictions = model.predict(stacked[:len(batch) * n_rows]).reshape(len(batch), n_rows)
+        residuals = predictions - y
+        sse = np.einsum('ij,ij->i', residuals, residuals)
+        for block, (i, feature, repeat), value in zip(blocks, batch, sse):
+            block[:, feature] = X[:, feature]
+            drops[i, repeat] = (value - baseline_sse) / ss_tot
+    return drops
+
+
+# Per-process state set up by _init_importance_worker
+_importance_state = {}
+
+def _init_importance_worker(handle, model, baseline_sse, ss_tot, n_repeats, random_state, batch_bytes):
+    X, y = attach_arrays(handle)
+    _importance_state.update(model=model, X=X, y=y, args=(baseline_sse, ss_tot, n_repeats,
+                                                          random_state, batch_bytes))
+
+def _score_drops_in_worker(features):
+    state = _importance_state
+    baseline_sse, ss_tot, n_repeats, random_state, batch_bytes = state['args']
+    return _score_drops(state['model'], state['X'], state['y'], baseline_sse, ss_tot,
+                        features, n_repeats, random_state, batch_bytes)
+
+
+def permutation_importance(model, X, y, feature_names=None, n_repeats=5, confidence=0.95,
+                           max_samples=None, batch_bytes=256 << 20, n_jobs=1, random_state=0):
+    """Permutation importance of each column of X for a fitted model.
+
+    Returns {feature name: {'importance', 'std', 'ci_low', 'ci_high'}} with
+    importance the mean drop in R² over n_repeats shuffles. max_samples
+    scores a random subset of rows to bound the cost on large sets.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if max_samples is not None and max_samples < len(y):
+        rows = np.sort(np.random.default_rng(random_state).choice(len(y), max_samples, replace=False))
+        X, y = X[rows], y[rows]
+    n_features = X.shape[1]
+    feature_names = list(feature_names) if feature_names is not None else [f"x{j}" for j in range(n_features)]
+
+    baseline_residuals = model.predict(X) - y
+    baseline_sse = float(baseline_residuals @ baseline_residuals)
+    ss_tot = float(np.sum((y - y.mean())**2)) or 1.0
+
+    n_workers = pool_size(n_jobs, n_features)
+    args = (baseline_sse, ss_tot, n_repeats, random_state, batch_bytes)
+    if n_workers == 1:
+        drops = _score_drops(model, X, y, baseline_sse, ss_tot, range(n_features), n_repeats,
+                             random_state, batch_bytes)
+    else:
+        groups = np.array_split(np.arange(n_features), n_workers)
+        with shared_pool((X, y), n_workers, _init_importance_worker, (model,) + args) as executor:
+            drops = np.vstack(list(executor.map(_score_drops_in_worker, [g.tolist() for g in groups])))
+
+    mean = drops.mean(axis=1)
+    std = drops.std(axis=1, ddof=1) if n_repeats > 1 else np.zeros(n_features)
+    half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * std / np.sqrt(n_repeats)
+    return {name: {'importance': float(mean[j]), 'std': float(std[j]),
+                   'ci_low': float(mean[j] - half_width[j]), 'ci_high': float(mean[j] + half_width[j])}
+            for j, name in enumerate(feature_names)}
@@ -0,0 +1,89 @@
+"""
+Regression Metrics
+==================
+
+Error and goodness-of-fit measures shared by training, evaluation and the
+benchmarks.
+
+StreamingMetrics accumulates MSE, MAE, R² and a residual histogram one chunk
+at a time in constant memory. The target's mean and sum of squared deviations
+are running moments merged with Chan's pairwise update, so accumulators built
+by different workers over disjoint chunks merge into the same result as one
+pass over all the data (up to floating-point rounding; counts and histograms
+merge exactly).
+"""
+
+import numpy as np
+
+# Residual (y_true - y_pred) histogram edges in tCO2e/ha; values outside fall
+# into the underflow and overflow bins at either end
+DEFAULT_RESIDUAL_BINS = np.linspace(-50, 50, 41)
+
+
+class StreamingMetrics:
+    # Elements per block inside update(), bounding the size of temporaries
+    block_size = 65536
+
+    def __init__(self, residual_bins=DEFAULT_RESIDUAL_BINS):
+        self.residual_bins = np.asarray(residual_bins, dtype=np.float64)
+        self.count = 0
+        self.sum_squared_error = 0.0
+        self.sum_absolute_error = 0.0
+        self.y_mean = 0.0
+        self.y_m2 = 0.0
+        self.histogram = np.zeros(len(self.residual_bins) + 1, dtype=np.int64)
+
+    def _add_moments(self, count, mean, m2):
+        n = self.count + count
+        delta = mean - self.y_mean
+        self.y_mean += delta * (count / n)
+        self.y_m2 += m2 + delta * delta * (self.count * count / n)
+        self.count = n
+
+    def update(self, y_true, y_pred):
+        """Add one chunk of targets and predictions"""
+        y_true = np.asarray(y_true, dtype=np.float64).ravel()
+        y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+        if len(y_true) != len(y_pred):
+            raise ValueError(f"y_true has {len(y_true)} values, y_pred {len(y_pred)}")
+
+        for start in range(0, len(y_true), self.block_size):
+            y = y_true[start:start + self.block_size]
+            residual = y - y_pred[start:start + self.block_size]
+            self.histogram += np.bincount(np.searchsorted(self.residual_bins, residual, side='right'),
+                                          minlength=len(self.histogram))
+            self.sum_absolute_error += float(np.sum(np.abs(residual)))
+            self.sum_squared_error += float(np.dot(residual, residual))
+
+            mean = float(np.mean(y))
+            np.subtract(y, mean, out=residual)
+            self._add_moments(len(y), mean, float(np.dot(residual, residual)))
+        return self
+
+    def merge(self, other):
+        """Fold in an accumulator built over other data (e.g. by another worker)"""
+        if not np.array_equal(self.residual_bins, other.residual_bins):
+            raise ValueError("cannot merge accumulators with different residual bins")
+        if other.count:
+            self._add_moments(other.count, other.y_mean, other.y_m2)
+        self.sum_squared_error += other.sum_squared_error
+        self.sum_absolute_error += other.sum_absolute_error
+        self.histogram += other.histogram
+        return self
+
+    def result(self):
+        """Metrics over everything seen so far, keyed like calculate_metrics"""
+        if not self.count:
+            raise ValueError("no data has been added")
+        mse = self.sum_squared_error / self.count
+        return {
+            'MSE': mse,
+            'RMSE': float(np.sqrt(mse)),
+            'MAE': self.sum_absolute_error / self.count,
+            'R2': 1 - (self.sum_squared_error / self.y_m2) if self.y_m2 > 0 else 0
+        }
+
+
+def calculate_metrics(y_true, y_pred):
+    """Calculate regression metrics"""
+    return StreamingMetrics().update(y_true, y_pred).result()
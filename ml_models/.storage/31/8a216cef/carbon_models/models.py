@@ -0,0 +1,927 @@
+"""
+Carbon Stock Estimation Models
+==============================
+
+The four regression models used for carbon sequestration prediction from
+remote sensing features (NDVI, canopy cover, soil carbon data): linear
+regression, random forest, gradient boosting and a small neural network.
+"""
+
+import os
+
+import numpy as np
+
+from carbon_models.shared_arrays import attach_arrays, pool_size, shared_pool
+
+# Model 1: Simple Linear Regression (Manual Implementation)
+class SimpleLinearRegression:
+    # Precision of the ridge prior on the coefficients when online updates
+    # start without a batch fit to build on
+    online_prior = 1e-6
+    
+    def __init__(self, forgetting_factor=1.0, restabilize_every=1000):
+        if not 0 < forgetting_factor <= 1:
+            raise ValueError(f"forgetting_factor must be in (0, 1], got {forgetting_factor}")
+        self.forgetting_factor = forgetting_factor
+        self.restabilize_every = restabilize_every
+        self.weights = None
+        self.bias = None
+        self.name = "Linear Regression"
+        # Online state: bias-augmented Gram matrix, X^T y and the inverse Gram
+        self._gram = None
+        self._moment = None
+        self._inverse = None
+        self._since_restabilize = 0
+    
+    def fit(self, X, y):
+        # Add bias term
+        X_with_bias = np.column_stack([np.ones(X.shape[0]), X])
+        
+        # Normal equation: theta = (X^T X)^-1 X^T y
+        self._solve_normal_equations(X_with_bias.T @ X_with_bias, X_with_bias.T @ y)
+    
+    def fit_chunked(self, X, y, block_size=100_000, n_jobs=1):
+        """Fit from row blocks without materializing the design matrix.
+        
+        X and y are arrays (np.memmap included) or paths to .npy files, which
+        are opened with mmap_mode='r'. Each block adds to the bias-augmented
+        Gram matrix X^T X and to X^T y, so peak memory is one block plus
+        O(p^2) however many rows there are. When X and y are both paths and
+        n_jobs > 1, the rows are split into contiguous ranges whose partial
+        sums are computed by worker processes (each mapping the .npy files
+        itself) and merged in order; in-memory arrays are always accumulated
+        in this process, whatever n_jobs is.
+        """
+        n_rows = len(_open_rows(y))
+        n_workers = pool_size(n_jobs, -(-n_rows // block_size))
+        if not (isinstance(X, (str, os.PathLike)) and isinstance(y, (str, os.PathLike))):
+            # Workers could only receive arrays as pickled copies
+            n_workers = 1
+        
+        if n_workers == 1:
+            XtX, Xty = _accumulate_normal_equations(X, y, 0, n_rows, block_size)
+        else:
+            # Range boundaries fall on block boundaries
+            n_blocks = -(-n_rows // block_size)
+            bounds = [min(n_rows, (n_blocks * i // n_workers) * block_size)
+                      for i in range(n_workers + 1)]
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                partials = list(executor.map(_accumulate_normal_equations,
+                                             [X] * n_workers, [y] * n_workers,
+                                             bounds[:-1], bounds[1:],
+                                             [block_size] * n_workers))
+            XtX = sum(partial[0] for partial in partials)
+            Xty = sum(partial[1] for partial in partials)
+        
+        self._solve_normal_equations(XtX, Xty)
+    
+    def _solve_normal_equations(self, XtX, Xty):
+        try:
+            theta = np.linalg.solve(XtX, Xty)
+        except np.linalg.LinAlgError:
+            # Fallback to pseudo-inverse if matrix is singular
+            theta = np.linalg.pinv(XtX) @ Xty
+        self.bias = theta[0]
+        self.weights = theta[1:]
+        # Kept (O(p^2)) so that partial_fit() can continue from this fit
+        self._gram = XtX
+        self._moment = Xty
+        self._inverse = None
+    
+    def partial_fit(self, X, y):
+        """Fold new rows into the fit by recursive least squares.
+        
+        Continues from the last fit() (or fit_chunked()), or from scratch with
+        a weak ridge prior. With forgetting_factor < 1 every earlier row's
+        weight is multiplied by it for each new row, so the fit tracks drift
+        with an effective memory of about 1 / (1 - forgetting_factor) rows.
+        
+        Rows are applied in micro-batches of at most p = n_features + 1 via
+        the Woodbury identity, updating the inverse Gram matrix in O(p^2) per
+        row. The Gram matrix and X^T y are updated alongside, and every
+        restabilize_every rows the inverse and the coefficients are recomputed
+        from them, discarding rounding error accumulated by the updates.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        n_params = X.shape[1] + 1
+        if self._inverse is None:
+            self._start_online(n_params)
+        for start in range(0, len(y), n_params):
+            self._rls_update(X[start:start + n_params], y[start:start + n_params])
+            self._since_restabilize += len(y[start:start + n_params])
+            if (self._since_restabilize >= self.restabilize_every or
+                    np.any(np.diag(self._inverse) <= 0)):
+                self.restabilize()
+    
+    def _start_online(self, n_params):
+        if self._gram is None:
+            # Weak prior centred on the current coefficients (zero if unfitted),
+            # e.g. for a model loaded from an artifact
+            self._gram = np.eye(n_params) * self.online_prior
+            theta = np.zeros(n_params) if self.weights is None else np.r_[self.bias, self.weights]
+            self._moment = self._gram @ theta
+        self.restabilize()
+    
+    def _rls_update(self, X, y):
+        lam = self.forgetting_factor
+        k = len(y)
+        Z = np.column_stack([np.ones(k), X])
+        theta = np.r_[self.bias, self.weights]
+        P = self._inverse
+        
+        # After the block, row i carries weight lam**(k-1-i) and the old data
+        # lam**k; relative to the old data that is D = diag(lam**-(i+1))
+        d_inverse = lam ** np.arange(1, k + 1) if lam != 1 else np.ones(k)
+        PZt = P @ Z.T
+        gain = np.linalg.solve(np.diag(d_inverse) + Z @ PZt, PZt.T).T
+        theta = theta + gain @ (y - Z @ theta)
+        P = (P - gain @ PZt.T) / lam**k
+        self._inverse = (P + P.T) / 2
+        self.bias = theta[0]
+        self.weights = theta[1:]
+        
+        weights = lam ** np.arange(k - 1, -1, -1) if lam != 1 else np.ones(k)
+        self._gram = self._gram * lam**k + (Z.T * weights) @ Z
+        self._moment = self._moment * lam**k + Z.T @ (weights * y)
+    
+    def restabilize(self):
+        """Recompute the coefficients and inverse Gram matrix from the Gram matrix"""
+        gram, moment = self._gram, self._moment
+        self._solve_normal_equations(gram, moment)
+        try:
+            inverse = np.linalg.inv(gram)
+        except np.linalg.LinAlgError:
+            inverse = np.linalg.pinv(gram)
+        self._inverse = (inverse + inverse.T) / 2
+        self._since_restabilize = 0
+    
+    def save_online_state(self, path):
+        """Checkpoint the online state to an .npz: the Gram matrix's upper
+        triangle and X^T y, O(p^2) floats; the rest is derived on load"""
+        if self._gram is None:
+            raise ValueError("no online state to save; call fit() or partial_fit() first")
+        upper = np.triu_indices(len(self._moment))
+        np.savez(path, gram=self._gram[upper], moment=self._moment,
+                 forgetting_factor=self.forgetting_factor, restabilize_every=self.restabilize_every)
+    
+    def load_online_state(self, path):
+        """Resume from save_online_state(); coefficients are re-solved from the Gram matrix"""
+        with np.load(path) as state:
+            moment = state['moment']
+            gram = np.zeros((len(moment), len(moment)))
+            gram[np.triu_indices(len(moment))] = state['gram']
+            self.forgetting_factor = float(state['forgetting_factor'])
+            self.restabilize_every = int(state['restabilize_every'])
+        self._gram = gram + np.triu(gram, 1).T
+        self._moment = moment
+        self.restabilize()
+    
+    def predict(self, X):
+        return X @ self.weights + self.bias
+
+def _open_rows(source):
+    """Map a .npy path read-only, or pass an array through unchanged"""
+    if isinstance(source, (str, os.PathLike)):
+        return np.load(source, mmap_mode='r')
+    return source
+
+def _accumulate_normal_equations(X, y, start, stop, block_size):
+    """Bias-augmented X^T X and X^T y over rows [start, stop), one block at a time"""
+    X = _open_rows(X)
+    y = _open_rows(y)
+    n_features = X.shape[1]
+    XtX = np.zeros((n_features + 1, n_features + 1))
+    Xty = np.zeros(n_features + 1)
+    
+    for block_start in range(start, stop, block_size):
+        block_stop = min(block_start + block_size, stop)
+        X_block = np.asarray(X[block_start:block_stop], dtype=np.float64)
+        y_block = np.asarray(y[block_start:block_stop], dtype=np.float64)
+        
+        # The bias column is implicit: its products are counts and sums
+        XtX[0, 0] += block_stop - block_start
+        column_sums = X_block.sum(axis=0)
+        XtX[0, 1:] += column_sums
+        XtX[1:, 0] += column_sums
+        XtX[1:, 1:] += X_block.T @ X_block
+        Xty[0] += y_block.sum()
+        Xty[1:] += X_block.T @ y_block
+    
+    return XtX, Xty
+
+# Model 2: Random Forest (Simplified Implementation)
+class SimpleRandomForest:
+    # Rows scored per block by the flat-array traversal in predict()
+    predict_chunk_size = 65536
+    # Bound on the (rows x trees) block predict_with_intervals keeps for quantiles
+    interval_buffer_bytes = 64 << 20
+
+    def __init__(self, n_trees=10, max_depth=5, splitter='random', n_jobs=1, random_state=None):
+        if splitter not in ('exact', 'random'):
+            raise ValueError(f"splitter must be 'exact' or 'random', got {splitter!r}")
+        self.n_trees = n_trees
+        self.max_depth = max_depth
+        self.splitter = splitter
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.trees = []
+        self.flat_trees = None
+        self.name = "Random Forest"
+    
+    def fit(self, X, y):
+        seeds = self._tree_seeds()
+        if seeds is None:
+            # Legacy path: one sequential stream from the global np.random state
+            self.trees = [self._build_tree(X, y, np.random) for _ in range(self.n_trees)]
+        elif self._n_workers() == 1:
+            self.trees = [self._build_tree(X, y, self._tree_rng(seed)) for seed in seeds]
+        else:
+            self.trees = self._fit_parallel(X, y, seeds)
+        
+        self._compile_trees()
+    
+    def _n_workers(self):
+        return pool_size(self.n_jobs, self.n_trees)
+    
+    def _tree_seeds(self):
+        """One independent seed per tree, derived from the master seed.
+        
+        Returns None for the legacy global-state path (no random_state and a
+        single job). Without random_state the master seed is drawn from the
+        global np.random state, so pass random_state for forests that are
+        identical for every n_jobs.
+        """
+        if self.random_state is None and self._n_workers() == 1:
+            return None
+        master = self.random_state
+        if master is None:
+            master = np.random.randint(2**31 - 1)
+        return np.random.SeedSequence(master).spawn(self.n_trees)
+    
+    @staticmethod
+    def _tree_rng(seed):
+        # RandomState exposes the same draw methods as the np.random module
+        return np.random.RandomState(np.random.MT19937(seed))
+    
+    def _build_tree(self, X, y, rng):
+        n_samples, n_features = X.shape
+        
+        # Bootstrap sampling
+        indices = rng.choice(n_samples, n_samples, replace=True)
+        
+        # Feature sampling
+        feature_indices = rng.choice(n_features, 
+                                     max(1, int(np.sqrt(n_features))), 
+                                     replace=False)
+        
+        # Create simple decision tree (regression tree)
+        if self.splitter == 'exact':
+            return self._create_tree_exact(X[np.ix_(indices, feature_indices)],
+                                           y[indices], feature_indices)
+        X_boot = X[indices]
+        y_boot = y[indices]
+        return self._create_tree(X_boot[:, feature_indices], y_boot, 
+                                 feature_indices, depth=0, rng=rng)
+    
+    def _fit_parallel(self, X, y, seeds):
+        """Build trees in a process pool that reads X and y from shared memory"""
+        arrays = (np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64))
+        params = {'max_depth': self.max_depth, 'splitter': self.splitter}
+        with shared_pool(arrays, self._n_workers(), _attach_shared_training_data, (params,)) as executor:
+            # map() yields in submission order, so tree order never
+            # depends on which worker finishes first
+            return list(executor.map(_build_tree_in_worker, seeds))
+    
+    def _create_tree(self, X, y, feature_indices, depth, rng=np.random):
+        # Simple stopping criteria
+        if depth >= self.max_depth or len(y) < 5 or np.var(y) < 0.1:
+            return {'type': 'leaf', 'value': np.mean(y)}
+        
+        best_score = float('inf')
+        best_split = None
+        
+        # Try random splits
+        for _ in range(min(10, X.shape[1])):
+            feature_idx = rng.randint(X.shape[1])
+            threshold = rng.uniform(X[:, feature_idx].min(), 
+                                        X[:, feature_idx].max())
+            
+            left_mask = X[:, feature_idx] <= threshold
+            right_mask = ~left_mask
+            
+            if np.sum(left_mask) < 2 or np.sum(right_mask) < 2:
+                continue
+            
+            # Calculate weighted MSE
+            left_mse = np.var(y[left_mask]) if np.sum(left_mask) > 0 else 0
+            right_mse = np.var(y[right_mask]) if np.sum(right_mask) > 0 else 0
+            weighted_mse = (np.sum(left_mask) * left_mse + 
+                           np.sum(right_mask) * right_mse) / len(y)
+            
+            if weighted_mse < best_score:
+                best_score = weighted_mse
+                best_split = {
+                    'feature_idx': feature_indices[feature_idx],
+                    'threshold': threshold,
+                    'left_mask': left_mask,
+                    'right_mask': right_mask
+                }
+        
+        if best_split is None:
+            return {'type': 'leaf', 'value': np.mean(y)}
+        
+        # Recursively create subtrees
+        left_tree = self._create_tree(X[best_split['left_mask']], 
+                                    y[best_split['left_mask']], 
+                                    feature_indices, depth + 1, rng)
+        right_tree = self._create_tree(X[best_split['right_mask']], 
+                                     y[best_split['right_mask']], 
+                                     feature_indices, depth + 1, rng)
+        
+        return {
+            'type': 'split',
+            'feature_idx': best_split['feature_idx'],
+            'threshold': best_split['threshold'],
+            'left': left_tree,
+            'right': right_tree
+        }
+    
+    def _create_tree_exact(self, X, y, feature_indices):
+        """Grow a tree with exact best-split search over presorted columns.
+        
+        Each column is argsorted once per tree. Nodes then work on index
+        partitions that keep every column in sorted order, so a node never
+        copies X and never sorts again.
+        """
+        sorted_idx = np.argsort(X, axis=0, kind='stable').T
+        in_left = np.zeros(len(y), dtype=bool)
+        return self._grow_exact(X, y, sorted_idx, in_left, feature_indices, depth=0)
+    
+    def _grow_exact(self, X, y, sorted_idx, in_left, feature_indices, depth):
+        # sorted_idx holds the node's rows, one row of indices per column,
+        # each ordered by that column's values
+        y_node = y[sorted_idx[0]]
+        n = len(y_node)
+        if depth >= self.max_depth or n < 5 or np.var(y_node) < 0.1:
+            return {'type': 'leaf', 'value': np.mean(y_node)}
+        
+        split = self._best_exact_split(X, y, sorted_idx, np.mean(y_node))
+        if split is None:
+            return {'type': 'leaf', 'value': np.mean(y_node)}
+        col, pos, threshold = split
+        
+        # Stable partition of every column's ordering by the chosen split
+        left_rows = sorted_idx[col, :pos + 1]
+        in_left[left_rows] = True
+        goes_left = in_left[sorted_idx]
+        in_left[left_rows] = False
+        n_left = pos + 1
+        left_idx = sorted_idx[goes_left].reshape(len(sorted_idx), n_left)
+        right_idx = sorted_idx[~goes_left].reshape(len(sorted_idx), n - n_left)
+        
+        return {
+            'type': 'split',
+            'feature_idx': feature_indices[col],
+            'threshold': threshold,
+            'left': self._grow_exact(X, y, left_idx, in_left, feature_indices, depth + 1),
+            'right': self._grow_exact(X, y, right_idx, in_left, feature_indices, depth + 1)
+        }
+    
+    def _best_exact_split(self, X, y, sorted_idx, y_mean):
+        """Score every threshold of every column in one cumulative-sum pass.
+        
+        Returns (column, last left position, threshold) for the split with the
+        lowest weighted variance, or None if no split leaves 2+ rows per side.
+        """
+        n_cols, n = sorted_idx.shape
+        x_sorted = X[sorted_idx, np.arange(n_cols)[:, None]]
+        # Centering on the node mean keeps the sum-of-squares form accurate
+        y_sorted = y[sorted_idx] - y_mean
+        
+        csum = np.cumsum(y_sorted, axis=1)
+        csq = np.cumsum(y_sorted * y_sorted, axis=1)
+        sum_left, sum_total = csum[:, :-1], csum[:, -1:]
+        sq_left, sq_total = csq[:, :-1], csq[:, -1:]
+        n_left = np.arange(1, n, dtype=np.float64)
+        n_right = n - n_left
+        
+        # n * weighted MSE = SSE(left) + SSE(right)
+        sse = (sq_left - sum_left ** 2 / n_left) + \
+              ((sq_total - sq_left) - (sum_total - sum_left) ** 2 / n_right)
+        valid = (x_sorted[:, :-1] < x_sorted[:, 1:]) & (n_left >= 2) & (n_right >= 2)
+        sse[~valid] = np.inf
+        
+        best = np.argmin(sse)
+        col, pos = divmod(best, n - 1)
+        if not np.isfinite(sse[col, pos]):
+            return None
+        
+        lo = x_sorted[col, pos]
+        hi = x_sorted[col, pos + 1]
+        threshold = lo + (hi - lo) / 2
+        if not lo <= threshold < hi:
+            threshold = lo
+        return col, pos, threshold
+    
+    def _predict_tree(self, tree, x):
+        if tree['type'] == 'leaf':
+            return tree['value']
+        
+        if x[tree['feature_idx']] <= tree['threshold']:
+            return self._predict_tree(tree['left'], x)
+        else:
+            return self._predict_tree(tree['right'], x)
+    
+    def _compile_trees(self):
+        """Flatten the nested-dict trees into node arrays for batch prediction"""
+        nodes = {'feature': [], 'threshold': [], 'left': [], 'right': [], 'value': []}
+        roots = []
+        depths = []
+        for tree in self.trees:
+            roots.append(len(nodes['feature']))
+            depths.append(self._flatten_node(tree, nodes))
+        
+        self.flat_trees = {
+            'feature': np.array(nodes['feature'], dtype=np.intp),
+            'threshold': np.array(nodes['threshold'], dtype=np.float64),
+            'left': np.array(nodes['left'], dtype=np.intp),
+            'right': np.array(nodes['right'], dtype=np.intp),
+            'value': np.array(nodes['value'], dtype=np.float64),
+            'roots': np.array(roots, dtype=np.intp),
+            'depths': np.array(depths, dtype=np.intp)
+        }
+    
+    def _flatten_node(self, node, nodes):
+        """Append a subtree to the node lists in pre-order and return its depth"""
+        idx = len(nodes['feature'])
+        # Leaves point back at themselves, so rows that reach one early stay put
+        nodes['feature'].append(0)
+        nodes['threshold'].append(0.0)
+        nodes['left'].append(idx)
+        nodes['right'].append(idx)
+        nodes['value'].append(0.0)
+        
+        if node['type'] == 'leaf':
+            nodes['value'][idx] = node['value']
+            return 0
+        
+        nodes['feature'][idx] = node['feature_idx']
+        nodes['threshold'][idx] = node['threshold']
+        nodes['left'][idx] = idx + 1
+        left_depth = self._flatten_node(node['left'], nodes)
+        nodes['right'][idx] = len(nodes['feature'])
+        right_depth = self._flatten_node(node['right'], nodes)
+        return 1 + max(left_depth, right_depth)
+    
+    def _tree_leaf_values(self, t, X_flat, row_offsets):
+        """Move every row down tree t one level at a time and return its leaf values"""
+        flat = self.flat_trees
+        node = np.full(len(row_offsets), flat['roots'][t], dtype=np.intp)
+        for _ in range(flat['depths'][t]):
+            go_left = X_flat[row_offsets + flat['feature'][node]] <= flat['threshold'][node]
+            node = np.where(go_left, flat['left'][node], flat['right'][node])
+        return flat['value'][node]
+    
+    def _sum_trees(self, start, stop, leaf_values, n_rows):
+        """Sum the leaf values of trees [start, stop) in NumPy's pairwise order.
+        
+        np.mean over a list of per-tree predictions sums with 8 interleaved
+        partial sums (splitting in halves above 128 items). Streaming the
+        trees through the same order keeps batch predictions bit-identical to
+        the per-row path without holding a (rows x trees) matrix.
+        """
+        n = stop - start
+        if n < 8:
+            total = np.zeros(n_rows)
+            for t in range(start, stop):
+                total += leaf_values(t)
+            return total
+        
+        if n <= 128:
+            lanes = [leaf_values(start + j) for j in range(8)]
+            t = start + 8
+            while t < stop - n % 8:
+                for j in range(8):
+                    lanes[j] += leaf_values(t + j)
+                t += 8
+            total = ((lanes[0] + lanes[1]) + (lanes[2] + lanes[3])) + \
+                    ((lanes[4] + lanes[5]) + (lanes[6] + lanes[7]))
+            for t in range(t, stop):
+                total += leaf_values(t)
+            return total
+        
+        half = n // 2
+        half -= half % 8
+        return (self._sum_trees(start, start + half, leaf_values, n_rows) +
+                self._sum_trees(start + half, stop, leaf_values, n_rows))
+    
+    def predict(self, X):
+        if getattr(self, 'flat_trees', None) is None:
+            self._compile_trees()
+        
+        n_trees = len(self.flat_trees['roots'])
+        predictions = np.zeros(X.shape[0])
+        for start in range(0, X.shape[0], self.predict_chunk_size):
+            chunk = np.ascontiguousarray(X[start:start + self.predict_chunk_size], dtype=np.float64)
+            n_rows, n_features = chunk.shape
+            X_flat = chunk.ravel()
+            row_offsets = np.arange(n_rows, dtype=np.intp) * n_features
+            
+            def leaf_values(t):
+                return self._tree_leaf_values(t, X_flat, row_offsets)
+            
+            total = self._sum_trees(0, n_trees, leaf_values, n_rows)
+            predictions[start:start + n_rows] = total / n_trees
+        return predictions
+
+    def predict_with_intervals(self, X, quantiles=(0.05, 0.95)):
+        """Mean, spread and quantiles of the per-tree predictions.
+
+        Returns {'mean', 'std', 'quantiles'}: 'mean' equals predict(X), 'std'
+        is the standard deviation across trees (ddof=0) and 'quantiles' is
+        (n_rows, len(quantiles)), one column per requested level.
+
+        Each tree is traversed once. Its leaf values feed the same pairwise
+        sum as predict() and, in the same step, a Welford update for the
+        spread, so mean and std need no per-tree storage. Exact quantiles
+        do need every tree's value for a row, so rows are scored in blocks
+        whose (rows x trees) buffer fits in interval_buffer_bytes; memory
+        is bounded by that buffer, not by the batch size.
+        """
+        if getattr(self, 'flat_trees', None) is None:
+            self._compile_trees()
+
+        quantiles = np.asarray(quantiles, dtype=np.float64).ravel()
+        n_trees = len(self.flat_trees['roots'])
+        block_size = self.predict_chunk_size
+        if len(quantiles):
+            block_size = max(1, min(block_size, self.interval_buffer_bytes // (8 * n_trees)))
+
+        mean = np.zeros(X.shape[0])
+        std = np.zeros(X.shape[0])
+        quantile_values = np.zeros((X.shape[0], len(quantiles)))
+        for start in range(0, X.shape[0], block_size):
+            chunk = np.ascontiguousarray(X[start:start + block_size], dtype=np.float64)
+            n_rows, n_features = chunk.shape
+            X_flat = chunk.ravel()
+            row_offsets = np.arange(n_rows, dtype=np.intp) * n_features
+            per_tree = np.empty((n_trees, n_rows)) if len(quantiles) else None
+            # Welford state; _sum_trees visits every tree exactly once, in any order
+            count = 0
+            running_mean = np.zeros(n_rows)
+            m2 = np.zeros(n_rows)
+
+            def leaf_values(t):
+                nonlocal count
+                values = self._tree_leaf_values(t, X_flat, row_offsets)
+                count += 1
+                delta = values - running_mean
+                np.add(running_mean, delta / count, out=running_mean)
+                np.add(m2, delta * (values - running_mean), out=m2)
+                if per_tree is not None:
+                    per_tree[t] = values
+                return values
+
+            total = self._sum_trees(0, n_trees, leaf_values, n_rows)
+            mean[start:start + n_rows] = total / n_trees
+            std[start:start + n_rows] = np.sqrt(m2 / n_trees)
+            if per_tree is not None:
+                quantile_values[start:start + n_rows] = np.quantile(per_tree, quantiles, axis=0).T
+        return {'mean': mean, 'std': std, 'quantiles': quantile_values}
+
+# Per-process state for parallel tree building (see SimpleRandomForest._fit_parallel)
+_worker_state = {}
+
+def _attach_shared_training_data(handle, params):
+    """Pool initializer: map the shared training matrix read-only, without copying"""
+    X, y = attach_arrays(handle)
+    _worker_state.update(X=X, y=y, forest=SimpleRandomForest(**params))
+
+def _build_tree_in_worker(seed):
+    forest = _worker_state['forest']
+    return forest._build_tree(_worker_state['X'], _worker_state['y'], forest._tree_rng(seed))
+
+# Model 3: Gradient Boosting (Simplified Implementation)
+def _forward_substitute(L, b):
+    """x with L x = b for lower-triangular L"""
+    x = np.empty(len(b))
+    for i in range(len(b)):
+        x[i] = (b[i] - L[i, :i] @ x[:i]) / L[i, i]
+    return x
+
+
+def _back_substitute(U, b):
+    """x with U x = b for upper-triangular U"""
+    x = np.empty(len(b))
+    for i in range(len(b) - 1, -1, -1):
+        x[i] = (b[i] - U[i, i + 1:] @ x[i + 1:]) / U[i, i]
+    return x
+
+
+class SimpleGradientBoosting:
+    def __init__(self, n_estimators=50, learning_rate=0.1):
+        self.n_estimators = n_estimators
+        self.learning_rate = learning_rate
+        self.models = []
+        self.initial_prediction = None
+        self.name = "Gradient Boosting"
+    
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        self.initial_prediction = np.mean(y)
+        self.models = []
+        
+        # Every round regresses a new residual vector on the same X, so the
+        # normal equations are factorized once up front
+        solve = self._factorize_normal_equations(X)
+        
+        current_predictions = np.full(len(y), self.initial_prediction)
+        residuals = np.empty(len(y))
+        predictions = np.empty(len(y))
+        Xtr = np.empty(X.shape[1] + 1)
+        
+        for _ in range(self.n_estimators):
+            # Calculate residuals
+            np.subtract(y, current_predictions, out=residuals)
+            
+            # Fit a simple model to residuals: X^T r, then the cached solve
+            Xtr[0] = residuals.sum()
+            Xtr[1:] = residuals @ X
+            theta = solve(Xtr)
+            model = SimpleLinearRegression()
+            model.bias = theta[0]
+            model.weights = theta[1:]
+            
+            # Update predictions
+            np.dot(X, model.weights, out=predictions)
+            predictions += model.bias
+            predictions *= self.learning_rate
+            current_predictions += predictions
+            
+            self.models.append(model)
+    
+    @staticmethod
+    def _factorize_normal_equations(X):
+        """Factorize the bias-augmented X^T X once and return a solver for it.
+        
+        The solver keeps the Cholesky factor L and solves L z = X^T r, then
+        L^T theta = z, by substitution: O(p^2) per call and as stable as a
+        direct solve. A singular X^T X falls back to its pseudo-inverse, as in
+        SimpleLinearRegression.
+        """
+        n_samples, n_features = X.shape
+        XtX = np.empty((n_features + 1, n_features + 1))
+        XtX[0, 0] = n_samples
+        XtX[0, 1:] = XtX[1:, 0] = X.sum(axis=0)
+        XtX[1:, 1:] = X.T @ X
+        
+        try:
+            L = np.linalg.cholesky(XtX)
+        except np.linalg.LinAlgError:
+            XtX_pinv = np.linalg.pinv(XtX)
+            return lambda Xty: XtX_pinv @ Xty
+        U = L.T.copy()
+        return lambda Xty: _back_substitute(U, _forward_substitute(L, Xty))
+    
+    def predict(self, X):
+        predictions = np.full(X.shape[0], self.initial_prediction)
+        for model in self.models:
+            predictions += self.learning_rate * model.predict(X)
+        return predictions
+
+# Model 4: Neural Network (Simple Implementation)
+class SimpleNeuralNetwork:
+    def __init__(self, hidden_size=20, learning_rate=0.01, epochs=100, batch_size=None,
+                 dtype=np.float64, validation_fraction=0.0, patience=10, random_state=None):
+        """batch_size=None keeps the original full-batch float64 training.
+        
+        Any batch_size switches to mini-batch training with shuffling from a
+        private Generator seeded by random_state, preallocated work buffers,
+        optional float32 (dtype) and, when validation_fraction > 0, early
+        stopping after `patience` epochs without held-out improvement.
+        """
+        if not 0 <= validation_fraction < 1:
+            raise ValueError(f"validation_fraction must be in [0, 1), got {validation_fraction}")
+        if batch_size is not None and batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        self.hidden_size = hidden_size
+        self.learning_rate = learning_rate
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.dtype = dtype
+        self.validation_fraction = validation_fraction
+        self.patience = patience
+        self.random_state = random_state
+        self.name = "Neural Network"
+    
+    def _sigmoid(self, x):
+        return 1 / (1 + np.exp(-np.clip(x, -500, 500)))
+    
+    def _sigmoid_derivative(self, x):
+        return x * (1 - x)
+    
+    def fit(self, X, y):
+        if self.batch_size is None:
+            self._fit_full_batch(X, y)
+        else:
+            self._fit_minibatch(X, y)
+    
+    def _fit_full_batch(self, X, y):
+        n_samples, n_features = X.shape
+        
+        # Initialize weights
+        np.random.seed(42)
+        self.W1 = np.random.randn(n_features, self.hidden_size) * 0.1
+        self.b1 = np.zeros((1, self.hidden_size))
+        self.W2 = np.random.randn(self.hidden_size, 1) * 0.1
+        self.b2 = np.zeros((1, 1))
+        
+        # Normalize target
+        self.y_mean = np.mean(y)
+        self.y_std = np.std(y)
+        y_norm = (y - self.y_mean) / (self.y_std + 1e-8)
+        
+        # Training loop
+        for epoch in range(self.epochs):
+            # Forward pass
+            z1 = X @ self.W1 + self.b1
+            a1 = self._sigmoid(z1)
+            z2 = a1 @ self.W2 + self.b2
+            a2 = z2  # Linear output for regression
+            
+            # Calculate loss
+            loss = np.mean((a2.flatten() - y_norm) ** 2)
+            
+            # Backward pass
+            dz2 = (a2.flatten() - y_norm).reshape(-1, 1) / n_samples
+            dW2 = a1.T @ dz2
+            db2 = np.sum(dz2, axis=0, keepdims=True)
+            
+            da1 = dz2 @ self.W2.T
+            dz1 = da1 * self._sigmoid_derivative(a1)
+            dW1 = X.T @ dz1
+            db1 = np.sum(dz1, axis=0, keepdims=True)
+            
+            # Update weights
+            self.W2 -= self.learning_rate * dW2
+            self.b2 -= self.learning_rate * db2
+            self.W1 -= self.learning_rate * dW1
+            self.b1 -= self.learning_rate * db1
+            
+            if epoch % 20 == 0:
+                print(f"  Epoch {epoch}, Loss: {loss:.4f}")
+    
+    def _fit_minibatch(self, X, y):
+        rng = np.random.default_rng(self.random_state)
+        dtype = np.dtype(self.dtype)
+        X = np.asarray(X, dtype=dtype)
+        n_samples, n_features = X.shape
+        hidden = self.hidden_size
+        lr = dtype.type(self.learning_rate)
+        
+        # Initialize weights
+        self.W1 = (rng.standard_normal((n_features, hidden)) * 0.1).astype(dtype)
+        self.b1 = np.zeros((1, hidden), dtype=dtype)
+        self.W2 = (rng.standard_normal((hidden, 1)) * 0.1).astype(dtype)
+        self.b2 = np.zeros((1, 1), dtype=dtype)
+        
+        # Normalize target
+        self.y_mean = np.mean(y)
+        self.y_std = np.std(y)
+        y_norm = ((y - self.y_mean) / (self.y_std + 1e-8)).astype(dtype)
+        
+        # Held-out split for early stopping
+        order = rng.permutation(n_samples)
+        n_val = int(round(n_samples * self.validation_fraction))
+        val_idx, train_idx = np.sort(order[:n_val]), order[n_val:]
+        if len(train_idx) == 0:
+            raise ValueError(f"validation_fraction={self.validation_fraction} leaves no training "
+                             f"rows out of {n_samples}")
+        
+        # Work buffers sized for a full batch; short batches use leading views
+        batch = min(self.batch_size, len(train_idx))
+        buf = {
+            'x': np.empty((batch, n_features), dtype=dtype),
+            'y': np.empty(batch, dtype=dtype),
+            'z1': np.empty((batch, hidden), dtype=dtype),
+            'a1': np.empty((batch, hidden), dtype=dtype),
+            'z2': np.empty((batch, 1), dtype=dtype),
+            'da1': np.empty((batch, hidden), dtype=dtype),
+            'dW1': np.empty((n_features, hidden), dtype=dtype),
+            'db1': np.empty((1, hidden), dtype=dtype),
+            'dW2': np.empty((hidden, 1), dtype=dtype),
+            'db2': np.empty((1, 1), dtype=dtype)
+        }
+        
+        best_loss = np.inf
+        best_weights = None
+        stale_epochs = 0
+        for epoch in range(self.epochs):
+            rng.shuffle(train_idx)
+            sse = 0.0
+            for start in range(0, len(train_idx), batch):
+                idx = train_idx[start:start + batch]
+                sse += self._train_batch(X, y_norm, idx, buf, lr)
+            loss = sse / len(train_idx)
+            
+            if epoch % 20 == 0:
+                print(f"  Epoch {epoch}, Loss: {loss:.4f}")
+            
+            if n_val:
+                val_loss = self._batched_sse(X, y_norm, val_idx, buf) / n_val
+                if val_loss < best_loss:
+                    best_loss = val_loss
+                    best_weights = [w.copy() for w in (self.W1, self.b1, self.W2, self.b2)]
+                    stale_epochs = 0
+                else:
+                    stale_epochs += 1
+                    if stale_epochs >= self.patience:
+                        print(f"  Early stopping at epoch {epoch}, best validation loss: {best_loss:.4f}")
+                        break
+        
+        if best_weights is not None:
+            self.W1, self.b1, self.W2, self.b2 = best_weights
+    
+    def _forward_into(self, X, idx, buf):
+        """Forward pass for rows idx using the preallocated buffers"""
+        m = len(idx)
+        x, z1, a1, z2 = buf['x'][:m], buf['z1'][:m], buf['a1'][:m], buf['z2'][:m]
+        np.take(X, idx, axis=0, out=x)
+        np.matmul(x, self.W1, out=z1)
+        z1 += self.b1
+        # In-place sigmoid; the clip bound keeps exp finite for the dtype
+        bound = 500 if z1.dtype == np.float64 else 80
+        np.clip(z1, -bound, bound, out=a1)
+        np.negative(a1, out=a1)
+        np.exp(a1, out=a1)
+        a1 += 1
+        np.reciprocal(a1, out=a1)
+        np.matmul(a1, self.W2, out=z2)
+        z2 += self.b2
+        return x, a1, z2
+    
+    def _batched_sse(self, X, y_norm, idx, buf):
+        """Sum of squared normalized errors over idx, one buffer-sized batch at a time"""
+        sse = 0.0
+        batch = len(buf['y'])
+        for start in range(0, len(idx), batch):
+            rows = idx[start:start + batch]
+            _, _, z2 = self._forward_into(X, rows, buf)
+            err = buf['y'][:len(rows)]
+            np.take(y_norm, rows, out=err)
+            np.subtract(z2[:, 0], err, out=err)
+            sse += float(err @ err)
+        return sse
+    
+    def _train_batch(self, X, y_norm, idx, buf, lr):
+        """One gradient step on rows idx; returns the batch sum of squared errors"""
+        m = len(idx)
+        x, a1, z2 = self._forward_into(X, idx, buf)
+        
+        # dz2 = (a2 - y) / m, kept in the z2 buffer
+        err = buf['y'][:m]
+        np.take(y_norm, idx, out=err)
+        z2[:, 0] -= err
+        sse = float(z2[:, 0] @ z2[:, 0])
+        z2 *= z2.dtype.type(1.0 / m)
+        dz2 = z2
+        
+        np.matmul(a1.T, dz2, out=buf['dW2'])
+        np.sum(dz2, axis=0, keepdims=True, out=buf['db2'])
+        
+        # dz1 = (dz2 @ W2^T) * a1 * (1 - a1), using z1 as scratch
+        da1, scratch = buf['da1'][:m], buf['z1'][:m]
+        np.matmul(dz2, self.W2.T, out=da1)
+        np.subtract(1, a1, out=scratch)
+        scratch *= a1
+        da1 *= scratch
+        np.matmul(x.T, da1, out=buf['dW1'])
+        np.sum(da1, axis=0, keepdims=True, out=buf['db1'])
+        
+        # Update weights
+        for weight, grad in ((self.W2, 'dW2'), (self.b2, 'db2'), (self.W1, 'dW1'), (self.b1, 'db1')):
+            buf[grad] *= lr
+            weight -= buf[grad]
+        return sse
+    
+    def predict(self, X):
+        z1 = X @ self.W1 + self.b1
+        a1 = self._sigmoid(z1)
+        z2 = a1 @ self.W2 + self.b2
+        # Denormalize output
+        return (z2.flatten() * self.y_std) + self.y_mean
+
+
+def get_params(model):
+    """Constructor arguments of model, read back from its attributes"""
+    import inspect
+
+    return {name: getattr(model, name) for name in inspect.signature(type(model).__init__).parameters
+            if name != 'self' and hasattr(model, name)}
+
+
+def clone(model):
+    """Unfitted copy of model with the same constructor arguments"""
+    return type(model)(**get_params(model))
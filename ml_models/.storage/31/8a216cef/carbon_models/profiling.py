@@ -0,0 +1,192 @@
+"""
+Run Profiling
+=============
+
+Nested phase timers with memory figures, cheap enough to leave on:
+
+    profiler = PhaseProfiler()
+    with profiler.phase('fit', rows=len(y)):
+        model.fit(X, y)
+    profiler.report()   # JSON-ready tree of phases
+
+Every phase records its wall time, rows/sec when given a row count, the
+resident set size at exit and the process's peak RSS so far (the
+getrusage high-water mark, so a phase that raised it shows a larger value
+than the phase before it). With trace_memory=True, each phase also gets its
+own peak of Python-allocated memory from tracemalloc, NumPy buffers
+included; that costs a hook on every allocation, so it is opt-in.
+
+profile='cprofile' runs cProfile over the whole run and dumps pstats to
+profile_path. profile='sample' instead samples the main thread's stack from
+a background thread every sample_interval seconds and writes collapsed
+stacks ("frame;frame;frame count" lines, the input format of flame graph
+tools); its overhead does not grow with the number of function calls.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, or None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    """Current resident set size, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
+
+
+class _StackSampler(threading.Thread):
+    """Counts the target thread's call stack every interval seconds"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class PhaseProfiler:
+    """Collects a tree of timed phases; see the module docstring"""
+
+    def __init__(self, trace_memory=False, profile=None, profile_path=None, sample_interval=0.005):
+        if profile not in (None, 'cprofile', 'sample'):
+            raise ValueError(f"profile must be None, 'cprofile' or 'sample', got {profile!r}")
+        if profile and not profile_path:
+            raise ValueError("profile_path is required when profiling")
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.profile_path = profile_path
+        self.sample_interval = sample_interval
+        self.phases = []
+        # Open phases: (record, its children list, traced peak carried over from closed children)
+        self._stack = []
+        self._profiler = None
+        self._started = None
+
+    def start(self):
+        """Start memory tracing and the profiler, if enabled"""
+        self._started = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == 'sample':
+            self._profiler = _StackSampler(threading.get_ident(), self.sample_interval)
+            self._profiler.start()
+        return self
+
+    def stop(self):
+        """Stop tracing and profiling and write the profile dump"""
+        if self.profile == 'cprofile' and self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile_path)
+        elif self.profile == 'sample' and self._profiler is not None:
+            self._profiler.stop()
+            self._profiler.dump(self.profile_path)
+        self._profiler = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @contextmanager
+    def phase(self, name, rows=None):
+        """Time the enclosed block as a child of the innermost open phase.
+
+        Yields the phase's record; setting record['rows'] inside the block
+        gives a row count that was not known on entry.
+        """
+        record = {'name': name}
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            # tracemalloc keeps a single peak; save the enclosing phase's
+            # peak so far and restart it for this phase
+            if self._stack:
+                self._stack[-1][2] = max(self._stack[-1][2], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        (self._stack[-1][1] if self._stack else self.phases).append(record)
+        frame = [record, [], 0]
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - start
+            self._stack.pop()
+            record['seconds'] = round(seconds, 6)
+            rows = record.get('rows', rows)
+            if rows is not None:
+                record['rows'] = int(rows)
+                record['rows_per_second'] = round(rows / seconds, 1) if seconds > 0 else None
+            record['rss_mb'] = _round(current_rss_mb())
+            record['peak_rss_mb'] = _round(peak_rss_mb())
+            if tracing:
+                peak = max(frame[2], tracemalloc.get_traced_memory()[1])
+                record['peak_traced_mb'] = round(peak / (1024 * 1024), 3)
+                if self._stack:
+                    self._stack[-1][2] = max(self._stack[-1][2], peak)
+            if frame[1]:
+                record['phases'] = frame[1]
+
+    def report(self):
+        """JSON-ready summary: settings, the phase tree and overall peak RSS"""
+        return {
+            'trace_memory': self.trace_memory,
+            'profile': self.profile,
+            'profile_path': self.profile_path,
+            'seconds': round(time.perf_counter() - self._started, 6) if self._started else None,
+            'peak_rss_mb': _round(peak_rss_mb()),
+            'phases': self.phases
+        }
@@ -0,0 +1,254 @@
+"""
+Hyperparameter Search
+=====================
+
+Successive halving and Hyperband over the built-in models.
+
+A trial trains one candidate configuration with a fraction of the full
+budget and scores it (R²) on a validation set. The budget resource is the
+model's own size where it has one (trees, boosting rounds, epochs; see
+RESOURCES) or the fraction of training samples used. Successive halving
+runs every candidate at the smallest budget, keeps the best 1/eta, and
+repeats with eta times the budget until one rung reaches the full budget.
+Hyperband runs several such brackets that trade candidate count against
+starting budget.
+
+All trials of a rung run concurrently in a process pool whose workers map
+the training and validation data from shared memory. Every finished trial
+is appended to a JSON-lines log with its score and cost (fit and predict
+seconds). The log doubles as the checkpoint: candidates are drawn from a
+seeded generator, so rerunning the same search replays the same trials and
+takes the results of any already in the log instead of training them again.
+Each logged trial carries a digest of the search's data (training and
+validation arrays) and seed; only trials with the current digest are reused,
+so a rerun on new data, another seed or another validation split trains from
+scratch rather than replaying stale scores.
+"""
+
+import contextlib
+import hashlib
+import io
+import json
+import math
+import os
+import time
+import zlib
+
+import numpy as np
+
+from carbon_models import models as model_classes
+from carbon_models.cache import data_digest
+from carbon_models.metrics import calculate_metrics
+from carbon_models.shared_arrays import attach_arrays, pool_size, shared_pool
+
+# Values tried for each hyperparameter
+SEARCH_SPACES = {
+    'SimpleRandomForest': {
+        'max_depth': [3, 4, 6, 8, 10, 12]
+    },
+    'SimpleGradientBoosting': {
+        'learning_rate': [0.01, 0.03, 0.1, 0.3]
+    },
+    'SimpleNeuralNetwork': {
+        'hidden_size': [5, 10, 15, 30, 60],
+        'learning_rate': [0.001, 0.003, 0.01, 0.03, 0.1],
+        'batch_size': [None, 64, 256]
+    }
+}
+
+# Constructor parameter that sets a model's size, and its value at full budget
+RESOURCES = {
+    'SimpleRandomForest': ('n_trees', 100),
+    'SimpleGradientBoosting': ('n_estimators', 300),
+    'SimpleNeuralNetwork': ('epochs', 300)
+}
+
+
+def sample_candidates(n, spaces=SEARCH_SPACES, rng=None):
+    """n (class name, params) pairs: a random model class, then a random value per parameter"""
+    rng = rng if rng is not None else np.random.default_rng()
+    class_names = sorted(spaces)
+    candidates = []
+    for _ in range(n):
+        class_name = class_names[rng.integers(len(class_names))]
+        params = {name: values[rng.integers(len(values))]
+                  for name, values in sorted(spaces[class_name].items())}
+        candidates.append((class_name, params))
+    return candidates
+
+
+def search_digest(X_train, y_train, X_val, y_val, random_state):
+    """Digest of a search's inputs; logged trials are only reused under the same digest"""
+    spec = [data_digest(X_train, y_train, []), data_digest(X_val, y_val, []), random_state]
+    return hashlib.sha256(json.dumps(spec, default=str).encode()).hexdigest()
+
+
+def _trial_key(class_name, params, budget, resource):
+    return json.dumps([class_name, params, round(budget, 12), resource], sort_keys=True)
+
+
+def _build_trial(class_name, params, budget, resource, n_samples):
+    """Model and training-row count for one candidate at a budget fraction"""
+    params = dict(params)
+    if resource == 'auto' and class_name in RESOURCES:
+        name, full = RESOURCES[class_name]
+        params[name] = max(1, int(round(budget * full)))
+        n_rows = n_samples
+    else:
+        n_rows = max(2, int(round(budget * n_samples)))
+    return getattr(model_classes, class_name)(**params), n_rows
+
+
+def _run_trial(data, class_name, params, budget, resource):
+    X_train, y_train, X_val, y_val = data
+    model, n_rows = _build_trial(class_name, params, budget, resource, len(y_train))
+    # Seed models that use the global random state from the trial itself, so
+    # a replayed trial (or one run by another worker) gets the same result
+    np.random.seed(zlib.crc32(_trial_key(class_name, params, budget, resource).encode()))
+
+    start = time.perf_counter()
+    # Rows are pre-shuffled, so the first n_rows are a random subsample
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.fit(X_train[:n_rows], y_train[:n_rows])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = model.predict(X_val)
+    predict_seconds = time.perf_counter() - start
+    metrics = calculate_metrics(y_val, predictions)
+    score = float(metrics['R2']) if np.all(np.isfinite(predictions)) else -math.inf
+    return {
+        'model': class_name,
+        'params': params,
+        'budget': budget,
+        'resource': resource,
+        'score': score,
+        'rmse': float(metrics['RMSE']),
+        'fit_seconds': fit_seconds,
+        'predict_seconds': predict_seconds
+    }
+
+
+# Per-process state set up by _init_search_worker
+_search_state = {}
+
+def _init_search_worker(handle):
+    _search_state['data'] = attach_arrays(handle)
+
+def _run_trial_in_worker(class_name, params, budget, resource):
+    return _run_trial(_search_state['data'], class_name, params, budget, resource)
+
+
+class HyperbandSearch:
+    """Successive halving / Hyperband driver with a resumable trial log"""
+
+    def __init__(self, spaces=SEARCH_SPACES, eta=3, min_budget=1/27, max_budget=1.0,
+                 resource='auto', n_jobs=-1, log_path=None, random_state=0):
+        if resource not in ('auto', 'samples'):
+            raise ValueError(f"resource must be 'auto' or 'samples', got {resource!r}")
+        self.spaces = spaces
+        self.eta = eta
+        self.min_budget = min_budget
+        self.max_budget = max_budget
+        self.resource = resource
+        self.n_jobs = n_jobs
+        self.log_path = log_path
+        self.random_state = random_state
+        self.trials = []
+        self.digest = None
+        # Logged trials skipped because they came from other data or another seed
+        self.stale_trials = 0
+
+    def _load_log(self):
+        completed = {}
+        self.stale_trials = 0
+        if self.log_path and os.path.exists(self.log_path):
+            with open(self.log_path, 'r+b') as f:
+                content = f.read()
+                # A crash can leave a torn last line; drop it so that trial reruns
+                end = content.rfind(b'\n') + 1
+                if end < len(content):
+                    f.truncate(end)
+            for line in content[:end].decode('utf-8').splitlines():
+                trial = json.loads(line)
+                if trial.get('digest') != self.digest:
+                    self.stale_trials += 1
+                    continue
+                key = _trial_key(trial['model'], trial['params'], trial['budget'], trial['resource'])
+                completed[key] = trial
+        return completed
+
+    def _log(self, trial):
+        self.trials.append(trial)
+        if self.log_path:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(trial) + '\n')
+
+    def _run_rung(self, executor, data, candidates, budget, completed, bracket, rung):
+        """Scores for candidates at budget, reusing logged trials"""
+        keys = [_trial_key(name, params, budget, self.resource) for name, params in candidates]
+        pending = {}
+        for key, (class_name, params) in zip(keys, candidates):
+            if key in pending:
+                continue
+            if key in completed:
+                self.trials.append(completed[key])
+                continue
+            args = (class_name, params, budget, self.resource)
+            pending[key] = (executor.submit(_run_trial_in_worker, *args) if executor
+                            else _run_trial(data, *args))
+        for key, result in pending.items():
+            trial = result.result() if executor else result
+            trial.update(bracket=bracket, rung=rung, digest=self.digest)
+            completed[key] = trial
+            self._log(trial)
+        return [completed[key]['score'] for key in keys]
+
+    def successive_halving(self, candidates, min_budget, executor=None, data=None,
+                           completed=None, bracket=0):
+        """Survivors of successive halving, best first, with their final scores"""
+        completed = self._load_log() if completed is None else completed
+        n_rungs = int(round(math.log(self.max_budget / min_budget, self.eta))) + 1
+        for rung in range(n_rungs):
+            budget = min(self.max_budget, min_budget * self.eta**rung)
+            scores = self._run_rung(executor, data, candidates, budget, completed, bracket, rung)
+            order = sorted(range(len(candidates)), key=lambda i: -scores[i])
+            n_keep = max(1, len(candidates) // self.eta) if rung < n_rungs - 1 else len(candidates)
+            candidates = [candidates[i] for i in order[:n_keep]]
+            scores = [scores[i] for i in order[:n_keep]]
+        return list(zip(candidates, scores))
+
+    def fit(self, X_train, y_train, X_val, y_val):
+        """Run every Hyperband bracket; returns the best (class name, params, score)"""
+        rng = np.random.default_rng(self.random_state)
+        order = rng.permutation(len(y_train))
+        data = [np.ascontiguousarray(X_train[order], dtype=np.float64),
+                np.ascontiguousarray(np.asarray(y_train)[order], dtype=np.float64),
+                np.asarray(X_val, dtype=np.float64), np.asarray(y_val, dtype=np.float64)]
+        self.digest = search_digest(*data, self.random_state)
+
+        s_max = int(round(math.log(self.max_budget / self.min_budget, self.eta)))
+        brackets = []
+        for s in range(s_max, -1, -1):
+            n = int(math.ceil((s_max + 1) / (s + 1) * self.eta**s))
+            brackets.append((s, sample_candidates(n, self.spaces, rng), self.max_budget * self.eta**-s))
+
+        completed = self._load_log()
+        self.trials = []
+        n_workers = pool_size(self.n_jobs)
+        with contextlib.ExitStack() as stack:
+            executor = None
+            if n_workers > 1:
+                executor = stack.enter_context(shared_pool(data, n_workers, _init_search_worker))
+            results = []
+            for s, candidates, min_budget in brackets:
+                results += self.successive_halving(candidates, min_budget, executor, data, completed, bracket=s)
+
+        (class_name, params), score = max(results, key=lambda result: result[1])
+        self.best_ = (class_name, params, score)
+        return self.best_
+
+    def best_model(self):
+        """Unfitted best model at full budget"""
+        class_name, params, _ = self.best_
+        return _build_trial(class_name, params, self.max_budget, self.resource, 1)[0]
@@ -0,0 +1,81 @@
+"""
+Shared-Memory Arrays
+====================
+
+Places NumPy arrays in one POSIX shared-memory block so process-pool workers
+can map them read-only instead of receiving a pickled copy per task.
+
+    n_workers = pool_size(n_jobs, len(tasks))
+    with shared_pool((X, y), n_workers, init, initargs=(model,)) as executor:
+        ...
+
+    def init(handle, model):
+        X, y = attach_arrays(handle)
+
+share_arrays() gives the handle alone, for pools set up some other way.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Keeps worker-side mappings alive for as long as the process uses the arrays
+_attached = []
+
+
+def pool_size(n_jobs, n_tasks=None):
+    """Worker count for n_jobs (one per CPU when n_jobs <= 0), at most n_tasks and at least 1"""
+    n_workers = n_jobs if n_jobs > 0 else (os.cpu_count() or 1)
+    if n_tasks is not None:
+        n_workers = min(n_workers, n_tasks)
+    return max(1, n_workers)
+
+
+def _align(n, alignment=64):
+    return -(-n // alignment) * alignment
+
+
+@contextmanager
+def share_arrays(*arrays):
+    """Copy arrays into a new shared block; yields a picklable handle, unlinks on exit"""
+    arrays = [np.ascontiguousarray(array) for array in arrays]
+    layout = []
+    offset = 0
+    for array in arrays:
+        layout.append((array.shape, array.dtype.str, offset))
+        offset = _align(offset + array.nbytes)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    try:
+        for array, (shape, dtype, start) in zip(arrays, layout):
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = array
+        yield shm.name, layout
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def attach_arrays(handle):
+    """Read-only views of the arrays behind a share_arrays handle, without copying"""
+    name, layout = handle
+    shm = shared_memory.SharedMemory(name=name)
+    _attached.append(shm)
+    views = []
+    for shape, dtype, offset in layout:
+        view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        view.flags.writeable = False
+        views.append(view)
+    return views
+
+
+@contextmanager
+def shared_pool(arrays, n_workers, initializer, initargs=()):
+    """ProcessPoolExecutor whose workers run initializer(handle, *initargs), with
+    handle from share_arrays(*arrays); the block is unlinked after the pool exits"""
+    with share_arrays(*arrays) as handle:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=initializer,
+                                 initargs=(handle,) + tuple(initargs)) as executor:
+            yield executor
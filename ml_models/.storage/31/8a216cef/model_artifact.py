@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Carbon Model Artifact Format
+============================
+
+Compatibility shim: the format now lives in carbon_models.artifact.
+
+Usage:
+    python model_artifact.py info ARTIFACT
+    python model_artifact.py coefficients ARTIFACT
+"""
+
+from carbon_models.artifact import (ALIGNMENT, FORMAT_VERSION, MAGIC, load_model, main,
+                                    read_header, save_model, service_key)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Carbon Prediction Worker
+========================
+
+Long-lived prediction process speaking newline-delimited JSON. The model
+artifact (see carbon_models/artifact.py) is loaded once at start-up; after that each
+stdin line is a request and each stdout line the matching response, in the
+same order.
+
+Request:   {"id": 1, "features": {"NDVI": 0.6, "Canopy_Cover_Percent": 70, ...}}
+           Feature keys may also use the mlService.ts names (ndvi,
+           canopyCoverPercent, ...), or "features" may be a list in the
+           artifact's feature order.
+Response:  {"id": 1, "prediction": 41.7}
+           {"id": 2, "error": "missing feature Soil_Carbon_Percent"}
+
+With --intervals LOW HIGH (random forest artifacts), responses also carry
+the spread of the per-tree predictions and those quantiles of it:
+
+           {"id": 1, "prediction": 41.7, "std": 3.2, "interval": [36.9, 46.1]}
+
+Requests are grouped into micro-batches of up to --max-batch rows, waiting at
+most --max-latency-ms after the first queued request, and each batch is
+scored with one vectorized predict() call. With --compiled, small batches
+(the common case for interactive traffic) are instead scored row by row
+with the generated predictor cached next to the artifact (see
+carbon_models/codegen.py), which avoids NumPy's per-call overhead.
+
+Usage:
+    python prediction_worker.py ARTIFACT [--max-batch 1024] [--max-latency-ms 2]
+                                [--intervals 0.05 0.95] [--compiled]
+"""
+
+import argparse
+import json
+import math
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+from carbon_models.artifact import load_model, service_key
+from carbon_models.codegen import load_predictor
+
+_EOF = object()
+
+
+class PredictionWorker:
+    # Largest batch scored row by row when a generated row predictor is set
+    row_predictor_max_rows = 64
+
+    def __init__(self, model, feature_names=None, max_batch=1024, max_latency=0.002, intervals=None,
+                 row_predictor=None):
+        if intervals is not None and not hasattr(model, 'predict_with_intervals'):
+            raise ValueError(f"{type(model).__name__} does not provide prediction intervals")
+        self.model = model
+        self.intervals = tuple(intervals) if intervals is not None else None
+        self.row_predictor = row_predictor
+        self.feature_names = list(feature_names or getattr(model, 'feature_names', None) or [])
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        # Accept both the training feature names and their mlService.ts keys
+        self._columns = {}
+        for i, name in enumerate(self.feature_names):
+            self._columns[name] = i
+            self._columns[service_key(name)] = i
+
+    @staticmethod
+    def _number(name, value):
+        """value as a float; raises ValueError unless it is a finite JSON number"""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            try:
+                number = float(value)
+            except OverflowError:
+                number = math.inf
+            if math.isfinite(number):
+                return number
+        raise ValueError(f"feature {name} must be a finite number, got {json.dumps(value)}")
+
+    def _row(self, request):
+        """Feature row of floats for one decoded request; raises ValueError on bad input"""
+        if not isinstance(request, dict) or 'features' not in request:
+            raise ValueError("request must be an object with 'features'")
+
+        features = request['features']
+        if isinstance(features, dict):
+            row = [None] * len(self.feature_names)
+            for key, value in features.items():
+                if key in self._columns:
+                    row[self._columns[key]] = value
+            for i, value in enumerate(row):
+                if value is None:
+                    raise ValueError(f"missing feature {self.feature_names[i]}")
+        elif isinstance(features, list):
+            row = features
+            if self.feature_names and len(row) != len(self.feature_names):
+                raise ValueError(f"expected {len(self.feature_names)} features, got {len(row)}")
+        else:
+            raise ValueError("'features' must be an object or a list")
+        names = self.feature_names or [str(i) for i in range(len(row))]
+        return [self._number(name, value) for name, value in zip(names, row)]
+
+    def predict_lines(self, lines):
+        """Score a micro-batch of request lines; returns response lines in order"""
+        responses = [None] * len(lines)
+        rows = []
+        positions = []
+        ids = []
+        for i, line in enumerate(lines):
+            request_id = None
+            try:
+                request = json.loads(line)
+                request_id = request.get('id') if isinstance(request, dict) else None
+                row = self._row(request)
+            except json.JSONDecodeError as e:
+                responses[i] = {'id': None, 'error': f"invalid JSON: {e}"}
+                continue
+            except (TypeError, ValueError) as e:
+                responses[i] = {'id': request_id, 'error': str(e)}
+                continue
+            rows.append(row)
+            positions.append(i)
+            ids.append(request_id)
+
+        if rows:
+            try:
+                if (self.intervals is None and self.row_predictor is not None and
+                        len(rows) <= self.row_predictor_max_rows):
+                    predictions = np.array([self.row_predictor(row) for row in rows])
+                elif self.intervals is None:
+                    predictions = self.model.predict(np.array(rows, dtype=np.float64))
+                else:
+                    # Mean, spread and quantiles from the same pass over the trees
+                    result = self.model.predict_with_intervals(np.array(rows, dtype=np.float64),
+                                                               self.intervals)
+                    predictions = result['mean']
+            except (TypeError, ValueError) as e:
+                for i, request_id in zip(positions, ids):
+                    responses[i] = {'id': request_id, 'error': f"prediction failed: {e}"}
+            else:
+                for row, (i, request_id, prediction) in enumerate(zip(positions, ids, predictions.tolist())):
+                    responses[i] = {'id': request_id, 'prediction': prediction}
+                    if self.intervals is not None:
+                        responses[i]['std'] = float(result['std'][row])
+                        responses[i]['interval'] = result['quantiles'][row].tolist()
+
+        return [json.dumps(response) + '\n' for response in responses]
+
+    def serve(self, infile, outfile):
+        """Read requests until EOF, answering each micro-batch as it fills"""
+        pending = queue.Queue(maxsize=self.max_batch * 8)
+
+        def read_requests():
+            for line in infile:
+                if line.strip():
+                    pending.put(line)
+            pending.put(_EOF)
+
+        threading.Thread(target=read_requests, daemon=True).start()
+
+        done = False
+        while not done:
+            item = pending.get()
+            if item is _EOF:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_latency
+            while len(batch) < self.max_batch:
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = pending.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                if item is _EOF:
+                    done = True
+                    break
+                batch.append(item)
+
+            outfile.write(''.join(self.predict_lines(batch)))
+            outfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('artifact')
+    parser.add_argument('--max-batch', type=int, default=1024)
+    parser.add_argument('--max-latency-ms', type=float, default=2.0)
+    parser.add_argument('--intervals', type=float, nargs=2, default=None, metavar=('LOW', 'HIGH'),
+                        help="add the per-tree std and these quantiles (random forest only)")
+    parser.add_argument('--compiled', action='store_true',
+                        help="score small batches with the generated single-row predictor")
+    args = parser.parse_args()
+
+    model = load_model(args.artifact)
+    row_predictor = None
+    if args.compiled:
+        try:
+            row_predictor = load_predictor(args.artifact)
+        except TypeError as e:
+            parser.error(str(e))
+    try:
+        worker = PredictionWorker(model, max_batch=args.max_batch, max_latency=args.max_latency_ms / 1000,
+                                  intervals=args.intervals, row_predictor=row_predictor)
+    except ValueError as e:
+        parser.error(str(e))
+    worker.serve(sys.stdin, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tiled Raster Carbon Prediction
+==============================
+
+Scores wall-to-wall rasters with any of the carbon models. Each feature band
+(NDVI, canopy cover, soil carbon, ...) is a 2-D array on the same grid, stored
+as .npy or as a raw binary file. The bands are memory-mapped and cut into
+tiles. Each tile is stacked into a (pixels x bands) table, passed through the
+model's predict(), and written into a memory-mapped output raster.
+
+Pixels are skipped (and written as the output nodata value) when any band is
+non-finite or equals that band's nodata value, or when an optional mask
+raster is zero. Memory use is bounded by the tile size; tiles are spread over
+a process pool, and each worker loads the model and maps the bands once.
+
+Usage:
+    python raster_prediction.py ARTIFACT OUTPUT.npy BAND.npy [BAND.npy ...]
+        [--nodata -9999] [--mask MASK.npy] [--tile-size 1024] [--n-jobs 8]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from carbon_models.shared_arrays import pool_size
+
+# Per-process state set up by init_tile_worker
+_tile_state = {}
+
+
+def open_band(path, shape=None, dtype=None):
+    """Map a band read-only: .npy files carry their own shape, raw files need shape and dtype"""
+    if str(path).endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    if shape is None or dtype is None:
+        raise ValueError(f"raw band {path} needs shape and dtype")
+    return np.memmap(path, dtype=dtype, mode='r', shape=tuple(shape))
+
+
+def tile_windows(shape, tile_size):
+    """(row_start, row_stop, col_start, col_stop) for every tile, in row-major order"""
+    n_rows, n_cols = shape
+    return [(r, min(r + tile_size, n_rows), c, min(c + tile_size, n_cols))
+            for r in range(0, n_rows, tile_size)
+            for c in range(0, n_cols, tile_size)]
+
+
+def init_tile_worker(model, band_specs, mask_spec, nodata, output_path=None, output_nodata=np.nan):
+    """Load the model and map the bands (and output, if any) into this process's tile state"""
+    if isinstance(model, (str, os.PathLike)):
+        from carbon_models.artifact import load_model
+        model = load_model(model)
+    _tile_state.update(
+        model=model,
+        bands=[open_band(*spec) for spec in band_specs],
+        mask=open_band(*mask_spec) if mask_spec else None,
+        output=np.load(output_path, mmap_mode='r+') if output_path is not None else None,
+        nodata=nodata,
+        output_nodata=output_nodata
+    )
+
+
+def read_tile_features(window):
+    """(pixels x bands feature table, valid-pixel mask) for one tile of the mapped bands"""
+    row_start, row_stop, col_start, col_stop = window
+    state = _tile_state
+    n_pixels = (row_stop - row_start) * (col_stop - col_start)
+
+    features = np.empty((n_pixels, len(state['bands'])))
+    valid = np.ones(n_pixels, dtype=bool)
+    for j, band in enumerate(state['bands']):
+        column = features[:, j]
+        column[:] = band[row_start:row_stop, col_start:col_stop].ravel()
+        valid &= np.isfinite(column)
+        if state['nodata'][j] is not None:
+            valid &= column != state['nodata'][j]
+    if state['mask'] is not None:
+        valid &= state['mask'][row_start:row_stop, col_start:col_stop].ravel() != 0
+    return features, valid
+
+
+def _predict_tile(window):
+    """Predict one tile into the output raster; returns its count of valid pixels"""
+    row_start, row_stop, col_start, col_stop = window
+    state = _tile_state
+    features, valid = read_tile_features(window)
+
+    output = state['output']
+    tile = np.full(len(valid), state['output_nodata'], dtype=output.dtype)
+    n_valid = int(np.count_nonzero(valid))
+    if n_valid == len(valid):
+        tile[:] = state['model'].predict(features)
+    elif n_valid:
+        tile[valid] = state['model'].predict(features[valid])
+    output[row_start:row_stop, col_start:col_stop] = tile.reshape(row_stop - row_start, -1)
+    return n_valid
+
+
+def prepare_band_specs(band_paths, nodata, mask_path, raw_shape, raw_dtype, extra_specs=()):
+    """Band and mask specs plus per-band nodata list and the common grid shape"""
+    band_specs = [(path, raw_shape, raw_dtype) for path in band_paths]
+    mask_spec = (mask_path, raw_shape, np.uint8) if mask_path is not None else None
+    if not isinstance(nodata, (list, tuple)):
+        nodata = [nodata] * len(band_paths)
+
+    specs = band_specs + ([mask_spec] if mask_spec else []) + list(extra_specs)
+    shapes = {open_band(*spec).shape for spec in specs}
+    if len(shapes) != 1:
+        raise ValueError(f"bands are not aligned: shapes {sorted(shapes)}")
+    return band_specs, mask_spec, list(nodata), shapes.pop()
+
+
+def predict_raster(model, band_paths, output_path, nodata=None, mask_path=None,
+                   output_nodata=np.nan, output_dtype=np.float32, tile_size=1024,
+                   n_jobs=1, raw_shape=None, raw_dtype=None):
+    """Write model predictions for every pixel of the band stack to output_path (.npy).
+
+    model is a model object or a model artifact path (workers then load it
+    themselves). band_paths must follow the model's feature order. nodata is
+    one value for all bands or a list with one value (or None) per band.
+    Returns the number of pixels that were predicted.
+    """
+    band_specs, mask_spec, nodata, shape = prepare_band_specs(band_paths, nodata, mask_path,
+                                                               raw_shape, raw_dtype)
+    output = np.lib.format.open_memmap(output_path, mode='w+', dtype=output_dtype, shape=shape)
+    windows = tile_windows(shape, tile_size)
+    init_args = (model, band_specs, mask_spec, nodata, output_path, output_nodata)
+
+    n_jobs = pool_size(n_jobs, len(windows))
+    if n_jobs == 1:
+        init_tile_worker(*init_args)
+        n_valid = sum(map(_predict_tile, windows))
+        _tile_state.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_tile_worker,
+                                 initargs=init_args) as executor:
+            n_valid = sum(executor.map(_predict_tile, windows, chunksize=max(1, len(windows) // (4 * n_jobs))))
+
+    # Workers share the file's pages, so one flush here covers their writes
+    output.flush()
+    return n_valid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('artifact')
+    parser.add_argument('output')
+    parser.add_argument('bands', nargs='+')
+    parser.add_argument('--nodata', type=float, default=None)
+    parser.add_argument('--mask', default=None)
+    parser.add_argument('--tile-size', type=int, default=1024)
+    parser.add_argument('--n-jobs', type=int, default=1)
+    parser.add_argument('--raw-shape', type=int, nargs=2, default=None, metavar=('ROWS', 'COLS'))
+    parser.add_argument('--raw-dtype', default=None)
+    args = parser.parse_args()
+
+    print("=== TILED RASTER CARBON PREDICTION ===\n")
+    start = time.perf_counter()
+    n_valid = predict_raster(args.artifact, args.bands, args.output, nodata=args.nodata,
+                             mask_path=args.mask, tile_size=args.tile_size, n_jobs=args.n_jobs,
+                             raw_shape=args.raw_shape, raw_dtype=args.raw_dtype)
+    elapsed = time.perf_counter() - start
+    print(f"✓ Predicted {n_valid:,} pixels in {elapsed:.2f}s ({n_valid / elapsed:,.0f} pixels/s)")
+    print(f"✓ Carbon raster saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Zonal Carbon Statistics
+=======================
+
+Aggregates carbon predictions per parcel (farm, field, plot) instead of per
+pixel. A parcel-ID label raster lies on the same grid as the feature bands
+(see raster_prediction.py); pixels labelled with the background ID (0 by
+default) or a negative ID belong to no parcel and are not predicted.
+
+Prediction and aggregation happen in one streaming pass over tiles. Each
+tile compacts its parcel IDs with np.unique and is reduced with np.bincount
+to a per-parcel count, mean and sum of squared deviations (M2); these
+partials are merged by parcel ID with the pairwise update of Chan et al.,
+which is exact for counts and sums and numerically stable for the variance.
+Per-pixel predictions never leave the tile, so memory is bounded by the
+tile size plus a few numbers per parcel, whatever the range of the IDs.
+
+The output is a CSV with one row per parcel: parcel_id, pixels, mean and
+variance of the per-hectare prediction, and the parcel total in tCO2e
+(the sum of predictions times --pixel-area-ha).
+
+Usage:
+    python zonal_statistics.py ARTIFACT LABELS.npy OUTPUT.csv BAND.npy [BAND.npy ...]
+        [--nodata -9999] [--mask MASK.npy] [--pixel-area-ha 0.01] [--n-jobs 8]
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from carbon_models.shared_arrays import pool_size
+from raster_prediction import (_tile_state, init_tile_worker, open_band, prepare_band_specs,
+                               read_tile_features, tile_windows)
+
+
+class ZonalAccumulator:
+    """Per-parcel count, mean and M2 for the parcels seen so far, sorted by parcel ID.
+
+    Storage grows with the number of parcels, not the largest ID, so sparse
+    cadastral IDs (e.g. around 2e9) cost no more than small ones.
+    """
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+
+    def update(self, ids, count, mean, m2):
+        """Merge partial statistics for the sorted, unique parcel IDs ids"""
+        if len(ids) == 0:
+            return
+        ids = np.asarray(ids, dtype=np.int64)
+        positions = np.searchsorted(self.ids, ids)
+        seen = positions < len(self.ids)
+        seen[seen] = self.ids[positions[seen]] == ids[seen]
+
+        at = positions[seen]
+        n_a = self.count[at]
+        n_b = count[seen]
+        n = n_a + n_b
+        delta = mean[seen] - self.mean[at]
+        self.mean[at] += delta * (n_b / n)
+        self.m2[at] += m2[seen] + delta**2 * (n_a * n_b / n)
+        self.count[at] = n
+
+        new = ~seen
+        if new.any():
+            # ids is sorted, so inserting before each position keeps self.ids sorted
+            at = positions[new]
+            self.ids = np.insert(self.ids, at, ids[new])
+            self.count = np.insert(self.count, at, count[new])
+            self.mean = np.insert(self.mean, at, mean[new])
+            self.m2 = np.insert(self.m2, at, m2[new])
+
+    def merge(self, other):
+        """Fold another accumulator (e.g. from a different worker) into this one"""
+        self.update(other.ids, other.count, other.mean, other.m2)
+
+    def result(self, pixel_area=1.0):
+        """Column dict for every parcel that received at least one pixel"""
+        count = self.count
+        mean = self.mean
+        return {
+            'parcel_id': self.ids.copy(),
+            'pixels': count.copy(),
+            'mean': mean.copy(),
+            'variance': self.m2 / count,
+            'total_tCO2e': mean * count * pixel_area
+        }
+
+
+def reduce_by_parcel(ids, values):
+    """Unique parcel IDs in ids with the count, mean and M2 of their values"""
+    parcels, inverse = np.unique(ids, return_inverse=True)
+    count = np.bincount(inverse)
+    mean = np.bincount(inverse, weights=values) / count
+    m2 = np.bincount(inverse, weights=(values - mean[inverse])**2)
+    return parcels, count, mean, m2
+
+
+def _init_zonal_worker(label_spec, background, *tile_args):
+    init_tile_worker(*tile_args)
+    _tile_state.update(labels=open_band(*label_spec), background=background)
+
+
+def _zonal_tile(window):
+    """Predict the parcel pixels of one tile and reduce them per parcel"""
+    row_start, row_stop, col_start, col_stop = window
+    state = _tile_state
+    features, valid = read_tile_features(window)
+    labels = state['labels'][row_start:row_stop, col_start:col_stop].ravel()
+    valid &= (labels >= 0) & (labels != state['background'])
+    if not valid.any():
+        return None
+    return reduce_by_parcel(labels[valid].astype(np.int64), state['model'].predict(features[valid]))
+
+
+def zonal_statistics(model, label_path, band_paths, nodata=None, mask_path=None,
+                     background=0, pixel_area=1.0, tile_size=1024, n_jobs=1,
+                     raw_shape=None, raw_dtype=None, raw_label_dtype=np.int32):
+    """Per-parcel pixel count, mean, variance and total of the model's predictions.
+
+    model, band_paths, nodata and mask_path are as in predict_raster.
+    label_path is an integer raster of parcel IDs on the same grid. Returns a
+    dict of equal-length columns sorted by parcel ID.
+    """
+    label_spec = (label_path, raw_shape, raw_label_dtype)
+    band_specs, mask_spec, nodata, shape = prepare_band_specs(band_paths, nodata, mask_path, raw_shape,
+                                                               raw_dtype, extra_specs=[label_spec])
+    if not np.issubdtype(open_band(*label_spec).dtype, np.integer):
+        raise ValueError(f"parcel labels must be integers, got {open_band(*label_spec).dtype}")
+    windows = tile_windows(shape, tile_size)
+    init_args = (label_spec, background, model, band_specs, mask_spec, nodata)
+
+    accumulator = ZonalAccumulator()
+    n_jobs = pool_size(n_jobs, len(windows))
+    if n_jobs == 1:
+        _init_zonal_worker(*init_args)
+        for partial in map(_zonal_tile, windows):
+            if partial is not None:
+                accumulator.update(*partial)
+        _tile_state.clear()
+    else:
+        # Tiles are merged in window order, so results do not depend on n_jobs
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_zonal_worker,
+                                 initargs=init_args) as executor:
+            chunksize = max(1, len(windows) // (4 * n_jobs))
+            for partial in executor.map(_zonal_tile, windows, chunksize=chunksize):
+                if partial is not None:
+                    accumulator.update(*partial)
+    return accumulator.result(pixel_area)
+
+
+def write_csv(stats, path):
+    columns = list(stats)
+    # A structured table keeps the integer columns integers; a plain 2-D
+    # array would round parcel IDs above 2**53 through float64
+    table = np.rec.fromarrays([stats[name] for name in columns], names=columns)
+    np.savetxt(path, table, delimiter=',', header=','.join(columns), comments='',
+               fmt=['%d', '%d', '%.6f', '%.6f', '%.6f'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('artifact')
+    parser.add_argument('labels')
+    parser.add_argument('output')
+    parser.add_argument('bands', nargs='+')
+    parser.add_argument('--nodata', type=float, default=None)
+    parser.add_argument('--mask', default=None)
+    parser.add_argument('--background', type=int, default=0)
+    parser.add_argument('--pixel-area-ha', type=float, default=1.0)
+    parser.add_argument('--tile-size', type=int, default=1024)
+    parser.add_argument('--n-jobs', type=int, default=1)
+    parser.add_argument('--raw-shape', type=int, nargs=2, default=None, metavar=('ROWS', 'COLS'))
+    parser.add_argument('--raw-dtype', default=None)
+    parser.add_argument('--raw-label-dtype', default='int32')
+    args = parser.parse_args()
+
+    print("=== ZONAL CARBON STATISTICS ===\n")
+    start = time.perf_counter()
+    stats = zonal_statistics(args.artifact, args.labels, args.bands, nodata=args.nodata,
+                             mask_path=args.mask, background=args.background,
+                             pixel_area=args.pixel_area_ha, tile_size=args.tile_size,
+                             n_jobs=args.n_jobs, raw_shape=args.raw_shape,
+                             raw_dtype=args.raw_dtype, raw_label_dtype=args.raw_label_dtype)
+    elapsed = time.perf_counter() - start
+    write_csv(stats, args.output)
+    print(f"✓ Aggregated {stats['pixels'].sum():,} pixels into {len(stats['parcel_id']):,} parcels "
+          f"in {elapsed:.2f}s")
+    print(f"✓ Total: {stats['total_tCO2e'].sum():,.1f} tCO2e")
+    print(f"✓ Parcel statistics saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
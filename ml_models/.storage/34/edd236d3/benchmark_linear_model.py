@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Simple Linear Model Fit Benchmark
+=================================
+
+Times SimpleLinearModel.fit (blocked upper-triangle accumulation plus
+Cholesky solve) against the original triple-loop normal equations.
+Standard library only, like simple_carbon_model.py itself.
+
+Usage:
+    python benchmark_linear_model.py [--samples 1000 10000 100000 1000000]
+"""
+
+import argparse
+import random
+import time
+
+from simple_carbon_model import SimpleLinearModel
+
+
+def fit_reference(model, X, y):
+    """Original fit: full design-matrix copy and X^T X over features x features x samples"""
+    n_samples = len(y)
+    n_features = len(X[0])
+
+    X_matrix = []
+    for i in range(n_samples):
+        X_matrix.append([1.0] + X[i])
+
+    XTX = [[0.0 for _ in range(n_features + 1)] for _ in range(n_features + 1)]
+    for i in range(n_features + 1):
+        for j in range(n_features + 1):
+            for k in range(n_samples):
+                XTX[i][j] += X_matrix[k][i] * X_matrix[k][j]
+
+    XTy = [0.0 for _ in range(n_features + 1)]
+    for i in range(n_features + 1):
+        for k in range(n_samples):
+            XTy[i] += X_matrix[k][i] * y[k]
+
+    weights = model._solve_linear_system(XTX, XTy)
+    return weights[0], weights[1:]
+
+
+def make_data(n_samples, rng):
+    """Rows of NDVI, canopy cover and soil carbon with a noisy linear target"""
+    X = []
+    y = []
+    for _ in range(n_samples):
+        ndvi = 0.1 + rng.random() * 0.8
+        canopy = rng.random() * 100
+        soil_carbon = 0.5 + rng.random() * 7.5
+        X.append([ndvi, canopy, soil_carbon])
+        y.append(ndvi * 25 + canopy * 0.15 + soil_carbon * 6 + rng.gauss(0, 3))
+    return X, y
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--samples', type=int, nargs='+',
+                        default=[1_000, 10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print("=== SIMPLE LINEAR MODEL FIT BENCHMARK ===\n")
+    print(f"{'Samples':>10} {'Reference (s)':>14} {'Fast (s)':>10} {'Speedup':>9} {'Max |Δw|':>10}")
+    print("-" * 57)
+
+    rng = random.Random(42)
+    for n_samples in args.samples:
+        X, y = make_data(n_samples, rng)
+        model = SimpleLinearModel()
+
+        start = time.perf_counter()
+        ref_bias, ref_weights = fit_reference(model, X, y)
+        reference_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        model.fit(X, y)
+        fast_time = time.perf_counter() - start
+
+        max_diff = max(abs(a - b) for a, b in zip([ref_bias] + ref_weights,
+                                                   [model.bias] + model.weights))
+        print(f"{n_samples:>10,} {reference_time:>14.3f} {fast_time:>10.3f} "
+              f"{reference_time / fast_time:>8.1f}x {max_diff:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,106 +9,161 @@ A basic implementation without external dependencies for demonstration.
 import math
 import json
 import os
+from array import array
+from bisect import bisect_right
 from datetime import datetime
+from itertools import chain, islice
+from operator import mul
 
-print("=== SIMPLE CARBON STOCK ESTIMATION MODEL ===\n")
+from synthetic_data import generate
+
+try:
+    from math import sumprod as _dot  # Python 3.12+
+except ImportError:
+    def _dot(a, b):
+        """Dot product of two equal-length sequences, looping in C"""
+        return sum(map(mul, a, b))
 
 # Create synthetic data for demonstration
-def create_synthetic_data():
+def create_synthetic_data(n_samples=1000, seed=42):
     """Create synthetic carbon stock data"""
     print("Creating synthetic carbon stock data...")
     
-    # Simple random number generator (Linear Congruential Generator)
-    class SimpleRandom:
-        def __init__(self, seed=42):
-            self.seed = seed
-        
-        def random(self):
-            self.seed = (self.seed * 1103515245 + 12345) % (2**31)
-            return self.seed / (2**31)
-        
-        def normal(self, mean=0, std=1):
-            # Box-Muller transform
-            if not hasattr(self, '_spare'):
-                u1 = self.random()
-                u2 = self.random()
-                self._spare = math.sqrt(-2 * math.log(u1)) * math.sin(2 * math.pi * u2)
-                return mean + std * math.sqrt(-2 * math.log(u1)) * math.cos(2 * math.pi * u2)
-            else:
-                spare = self._spare
-                del self._spare
-                return mean + std * spare
-    
-    rng = SimpleRandom(42)
-    n_samples = 1000
-    
-    # Generate features
-    data = {
-        'NDVI': [],
-        'Canopy_Cover_Percent': [],
-        'Soil_Carbon_Percent': [],
-        'Carbon_Sequestration_tCO2e_ha': []
-    }
-    
-    for i in range(n_samples):
-        # NDVI (0.1 to 0.9)
-        ndvi = 0.1 + rng.random() * 0.8
-        
-        # Canopy cover (0 to 100%)
-        canopy = rng.random() * 100
-        
-        # Soil carbon (0.5 to 8%)
-        soil_carbon = 0.5 + rng.random() * 7.5
-        
-        # Carbon sequestration with realistic relationships
-        carbon_seq = (ndvi * 25 + canopy * 0.15 + soil_carbon * 6 + 
-                     rng.normal(0, 3))
-        carbon_seq = max(0, min(carbon_seq, 100))  # Clip to realistic range
-        
-        data['NDVI'].append(ndvi)
-        data['Canopy_Cover_Percent'].append(canopy)
-        data['Soil_Carbon_Percent'].append(soil_carbon)
-        data['Carbon_Sequestration_tCO2e_ha'].append(carbon_seq)
-    
-    return data
+    # Same LCG stream as always; see synthetic_data.py for chunked/parallel use
+    columns = generate(0, n_samples, seed, backend='array')
+    return {name: list(column) for name, column in columns.items()}
 
 # Simple linear regression implementation
 class SimpleLinearModel:
-    def __init__(self):
+    # Rows per block when accumulating the normal equations in fit()
+    block_size = 4096
+    # Precision of the ridge prior used when partial_fit() starts unfitted
+    online_prior = 1e-6
+    
+    def __init__(self, forgetting_factor=1.0, restabilize_every=1000):
+        if not 0 < forgetting_factor <= 1:
+            raise ValueError(f"forgetting_factor must be in (0, 1], got {forgetting_factor}")
+        self.forgetting_factor = forgetting_factor
+        self.restabilize_every = restabilize_every
         self.weights = None
         self.bias = None
         self.feature_names = None
+        # Online state, all packed upper triangles / vectors over the
+        # bias-augmented parameters: Gram matrix, X^T y, inverse Gram matrix
+        self._gram = None
+        self._moment = None
+        self._inverse = None
+        self._since_restabilize = 0
     
     def fit(self, X, y):
         """Fit linear regression using normal equations"""
-        n_samples = len(y)
-        n_features = len(X[0])
+        # Accumulate X^T X (upper triangle only, packed row by row) and X^T y
+        # for the design matrix with a leading bias column
+        XTX, XTy, n_params = self._accumulate_normal_equations(X, y)
+        self._solve_packed(XTX, XTy, n_params)
+    
+    def _solve_packed(self, XTX, XTy, n_params):
+        weights = self._cholesky_solve(XTX, XTy, n_params)
+        if weights is None:
+            # Ill-conditioned: fall back to Gaussian elimination with pivoting
+            weights = self._solve_linear_system(self._unpack(XTX, n_params), list(XTy))
         
-        # Create design matrix with bias term
-        X_matrix = []
-        for i in range(n_samples):
-            row = [1.0] + X[i]  # Add bias term
-            X_matrix.append(row)
+        self.bias = weights[0]
+        self.weights = weights[1:]
+        # Kept (O(p^2)) so that partial_fit() can continue from this fit
+        self._gram = XTX
+        self._moment = XTy
+        self._inverse = None
+    
+    def _accumulate_normal_equations(self, X, y):
+        """Single streaming pass over the rows, one block at a time.
         
-        # Solve normal equations: (X^T X) w = X^T y
-        # First compute X^T X
-        XTX = [[0.0 for _ in range(n_features + 1)] for _ in range(n_features + 1)]
-        for i in range(n_features + 1):
-            for j in range(n_features + 1):
-                for k in range(n_samples):
-                    XTX[i][j] += X_matrix[k][i] * X_matrix[k][j]
+        Each block is flattened into an array('d') and sliced into columns, so
+        the dot products run in C instead of per-element Python code.
+        """
+        rows_iter = iter(X)
+        targets_iter = iter(y)
+        XTX = XTy = None
+        n_params = 0
+        while True:
+            rows = list(islice(rows_iter, self.block_size))
+            if not rows:
+                break
+            n_features = len(rows[0])
+            flat = array('d', chain.from_iterable(rows))
+            columns = [flat[i::n_features] for i in range(n_features)]
+            targets = array('d', islice(targets_iter, len(rows)))
+            
+            if XTX is None:
+                n_params = n_features + 1
+                XTX = array('d', [0.0]) * (n_params * (n_params + 1) // 2)
+                XTy = array('d', [0.0]) * n_params
+            
+            # Bias row of the triangle: the row count, then column sums
+            XTX[0] += len(rows)
+            for j, column in enumerate(columns, 1):
+                XTX[j] += sum(column)
+            XTy[0] += sum(targets)
+            
+            k = n_params
+            for i, column_i in enumerate(columns):
+                for column_j in columns[i:]:
+                    XTX[k] += _dot(column_i, column_j)
+                    k += 1
+                XTy[i + 1] += _dot(column_i, targets)
         
-        # Compute X^T y
-        XTy = [0.0 for _ in range(n_features + 1)]
-        for i in range(n_features + 1):
-            for k in range(n_samples):
-                XTy[i] += X_matrix[k][i] * y[k]
+        return XTX, XTy, n_params
+    
+    @staticmethod
+    def _packed_index(i, j, n):
+        """Position of (i, j), i <= j, in a row-packed upper triangle"""
+        return i * n - i * (i - 1) // 2 + (j - i)
+    
+    def _unpack(self, packed, n):
+        return [[packed[self._packed_index(min(i, j), max(i, j), n)] for j in range(n)]
+                for i in range(n)]
+    
+    def _cholesky_solve(self, XTX, XTy, n, rtol=1e-12):
+        """Solve (X^T X) w = X^T y by Cholesky factorization of the packed triangle.
         
-        # Solve linear system using Gaussian elimination
-        weights = self._solve_linear_system(XTX, XTy)
+        Returns None when a pivot is not clearly positive relative to the
+        largest diagonal entry, i.e. the matrix is (nearly) singular.
+        """
+        U = self._cholesky_factor(XTX, n, rtol)
+        return None if U is None else self._cholesky_substitute(U, XTy, n)
+    
+    def _cholesky_factor(self, XTX, n, rtol=1e-12):
+        """Packed upper-triangular U with X^T X = U^T U, or None if (nearly) singular"""
+        U = array('d', XTX)
+        scale = max(U[self._packed_index(i, i, n)] for i in range(n))
+        if scale <= 0:
+            return None
         
-        self.bias = weights[0]
-        self.weights = weights[1:]
+        # In place: X^T X = U^T U with U upper triangular
+        for i in range(n):
+            ii = self._packed_index(i, i, n)
+            pivot = U[ii] - sum(U[self._packed_index(k, i, n)] ** 2 for k in range(i))
+            if pivot <= rtol * scale:
+                return None
+            U[ii] = math.sqrt(pivot)
+            for j in range(i + 1, n):
+                ij = self._packed_index(i, j, n)
+                U[ij] = (U[ij] - sum(U[self._packed_index(k, i, n)] * U[self._packed_index(k, j, n)]
+                                     for k in range(i))) / U[ii]
+        return U
+    
+    def _cholesky_substitute(self, U, XTy, n):
+        """Solve U^T U w = X^T y given the packed Cholesky factor U"""
+        # Forward substitution U^T z = X^T y, then back substitution U w = z
+        z = [0.0] * n
+        for i in range(n):
+            z[i] = (XTy[i] - sum(U[self._packed_index(k, i, n)] * z[k] for k in range(i))) / \
+                U[self._packed_index(i, i, n)]
+        w = [0.0] * n
+        for i in range(n - 1, -1, -1):
+            w[i] = (z[i] - sum(U[self._packed_index(i, j, n)] * w[j] for j in range(i + 1, n))) / \
+                U[self._packed_index(i, i, n)]
+        return w
     
     def _solve_linear_system(self, A, b):
         """Solve Ax = b using Gaussian elimination"""
@@ -146,6 +201,101 @@ class SimpleLinearModel:
         
         return x
     
+    def partial_fit(self, X, y):
+        """Fold new rows into the fit by recursive least squares.
+        
+        Continues from the last fit(), or from scratch with a weak ridge
+        prior. With forgetting_factor < 1 every earlier row's weight is
+        multiplied by it for each new row, so the fit tracks drift with an
+        effective memory of about 1 / (1 - forgetting_factor) rows.
+        
+        Each row is a Sherman-Morrison update of the packed inverse Gram
+        matrix, O(p^2) for p = n_features + 1. The Gram matrix and X^T y are
+        updated alongside, and every restabilize_every rows the inverse and
+        coefficients are recomputed from them, discarding accumulated
+        rounding error.
+        """
+        lam = self.forgetting_factor
+        for x, target in zip(X, y):
+            z = [1.0] + list(x)
+            n = len(z)
+            if self._inverse is None:
+                self._start_online(n)
+            P = self._inverse
+            theta = [self.bias] + list(self.weights)
+            
+            Pz = [_dot([P[self._packed_index(min(i, j), max(i, j), n)] for j in range(n)], z)
+                  for i in range(n)]
+            denominator = lam + _dot(z, Pz)
+            error = target - _dot(theta, z)
+            gain = [value / denominator for value in Pz]
+            theta = [t + g * error for t, g in zip(theta, gain)]
+            self.bias = theta[0]
+            self.weights = theta[1:]
+            
+            # P <- (P - gain Pz^T) / lam; the correction is symmetric, so
+            # updating the packed triangle keeps P exactly symmetric
+            G = self._gram
+            k = 0
+            for i in range(n):
+                for j in range(i, n):
+                    P[k] = (P[k] - gain[i] * Pz[j]) / lam
+                    G[k] = G[k] * lam + z[i] * z[j]
+                    k += 1
+                self._moment[i] = self._moment[i] * lam + z[i] * target
+            
+            self._since_restabilize += 1
+            if (self._since_restabilize >= self.restabilize_every or
+                    any(P[self._packed_index(i, i, n)] <= 0 for i in range(n))):
+                self.restabilize()
+    
+    def _start_online(self, n):
+        if self._gram is None:
+            # Weak prior centred on the current coefficients (zero if unfitted)
+            theta = [0.0] * n if self.weights is None else [self.bias] + list(self.weights)
+            self._gram = array('d', [0.0]) * (n * (n + 1) // 2)
+            for i in range(n):
+                self._gram[self._packed_index(i, i, n)] = self.online_prior
+            self._moment = array('d', [self.online_prior * t for t in theta])
+        self.restabilize()
+    
+    def restabilize(self):
+        """Recompute the coefficients and inverse Gram matrix from the Gram matrix"""
+        gram, moment = self._gram, self._moment
+        n = len(moment)
+        self._solve_packed(gram, moment, n)
+        
+        U = self._cholesky_factor(gram, n)
+        columns = []
+        for i in range(n):
+            unit = [0.0] * n
+            unit[i] = 1.0
+            columns.append(self._cholesky_substitute(U, unit, n) if U is not None
+                           else self._solve_linear_system(self._unpack(gram, n), unit))
+        self._inverse = array('d', [(columns[i][j] + columns[j][i]) / 2
+                                    for i in range(n) for j in range(i, n)])
+        self._since_restabilize = 0
+    
+    def save_online_state(self, path):
+        """Checkpoint the online state as JSON: the packed Gram matrix and
+        X^T y, O(p^2) numbers; the rest is derived on load"""
+        if self._gram is None:
+            raise ValueError("no online state to save; call fit() or partial_fit() first")
+        with open(path, 'w') as f:
+            json.dump({'gram': list(self._gram), 'moment': list(self._moment),
+                       'forgetting_factor': self.forgetting_factor,
+                       'restabilize_every': self.restabilize_every}, f)
+    
+    def load_online_state(self, path):
+        """Resume from save_online_state(); coefficients are re-solved from the Gram matrix"""
+        with open(path) as f:
+            state = json.load(f)
+        self.forgetting_factor = state['forgetting_factor']
+        self.restabilize_every = state['restabilize_every']
+        self._gram = array('d', state['gram'])
+        self._moment = array('d', state['moment'])
+        self.restabilize()
+    
     def predict(self, X):
         """Make predictions"""
         predictions = []
@@ -157,32 +307,77 @@ class SimpleLinearModel:
         return predictions
 
 # Evaluation metrics
+class StreamingMetrics:
+    """Single-pass MSE, MAE, R² and residual histogram, mergeable across chunks.
+
+    The target's mean and sum of squared deviations are Welford running
+    moments; merge() combines them with Chan's pairwise update.
+    """
+    # Residual (y_true - y_pred) histogram edges in tCO2e/ha, plus an
+    # underflow and an overflow bin
+    residual_bins = [-50 + 2.5 * i for i in range(41)]
+    
+    def __init__(self):
+        self.count = 0
+        self.sum_squared_error = 0.0
+        self.sum_absolute_error = 0.0
+        self.y_mean = 0.0
+        self.y_m2 = 0.0
+        self.histogram = [0] * (len(self.residual_bins) + 1)
+    
+    def update(self, y_true, y_pred):
+        """Add one chunk of targets and predictions"""
+        bins = self.residual_bins
+        histogram = self.histogram
+        count, y_mean, y_m2 = self.count, self.y_mean, self.y_m2
+        sse = sae = 0.0
+        for y, pred in zip(y_true, y_pred):
+            residual = y - pred
+            sse += residual * residual
+            sae += abs(residual)
+            histogram[bisect_right(bins, residual)] += 1
+            count += 1
+            delta = y - y_mean
+            y_mean += delta / count
+            y_m2 += delta * (y - y_mean)
+        self.count, self.y_mean, self.y_m2 = count, y_mean, y_m2
+        self.sum_squared_error += sse
+        self.sum_absolute_error += sae
+        return self
+    
+    def merge(self, other):
+        """Fold in an accumulator built over other data (e.g. by another worker)"""
+        if other.count:
+            n = self.count + other.count
+            delta = other.y_mean - self.y_mean
+            self.y_mean += delta * other.count / n
+            self.y_m2 += other.y_m2 + delta * delta * self.count * other.count / n
+            self.count = n
+        self.sum_squared_error += other.sum_squared_error
+        self.sum_absolute_error += other.sum_absolute_error
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+        return self
+    
+    def result(self):
+        """Metrics over everything seen so far"""
+        if not self.count:
+            raise ValueError("no data has been added")
+        mse = self.sum_squared_error / self.count
+        return {
+            'MSE': mse,
+            'RMSE': math.sqrt(mse),
+            'MAE': self.sum_absolute_error / self.count,
+            'R2': 1 - (self.sum_squared_error / self.y_m2) if self.y_m2 > 0 else 0
+        }
+
 def calculate_metrics(y_true, y_pred):
     """Calculate regression metrics"""
-    n = len(y_true)
-    
-    # MSE and RMSE
-    mse = sum((y_true[i] - y_pred[i])**2 for i in range(n)) / n
-    rmse = math.sqrt(mse)
-    
-    # MAE
-    mae = sum(abs(y_true[i] - y_pred[i]) for i in range(n)) / n
-    
-    # R-squared
-    y_mean = sum(y_true) / n
-    ss_tot = sum((y_true[i] - y_mean)**2 for i in range(n))
-    ss_res = sum((y_true[i] - y_pred[i])**2 for i in range(n))
-    r2 = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
-    
-    return {
-        'MSE': mse,
-        'RMSE': rmse,
-        'MAE': mae,
-        'R2': r2
-    }
+    return StreamingMetrics().update(y_true, y_pred).result()
 
 # Main execution
 def main():
+    print("=== SIMPLE CARBON STOCK ESTIMATION MODEL ===\n")
+
     # Create synthetic data
     data = create_synthetic_data()
     print(f"✓ Created {len(data['NDVI'])} samples")
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Chunked Synthetic Carbon Data Generator
+=======================================
+
+Produces the same synthetic carbon stock samples as the SimpleRandom loop in
+simple_carbon_model.py, but as columnar chunks: NumPy arrays when NumPy is
+installed, array('d') columns otherwise.
+
+The LCG supports jump-ahead, so sample i can be produced without generating
+samples 0..i-1. Workers that each take a disjoint range of sample indices
+therefore produce exactly the rows a single sequential run would.
+
+Usage:
+    python synthetic_data.py OUTPUT_DIR --samples 100000000 [--seed 42] [--n-jobs 8]
+"""
+
+import argparse
+import math
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # edge gateways run without NumPy
+    np = None
+
+COLUMNS = ('NDVI', 'Canopy_Cover_Percent', 'Soil_Carbon_Percent', 'Carbon_Sequestration_tCO2e_ha')
+
+# Every pair of samples consumes 8 uniforms: NDVI, canopy and soil carbon for
+# the first sample, two for its Box-Muller normal, then NDVI, canopy and soil
+# carbon for the second, whose noise is the cached spare normal.
+DRAWS_PER_PAIR = 8
+
+
+class LCG:
+    """The SimpleRandom linear congruential generator, with jump-ahead"""
+    MULTIPLIER = 1103515245
+    INCREMENT = 12345
+    MODULUS = 2**31
+
+    def __init__(self, seed=42):
+        self.state = seed
+
+    def random(self):
+        self.state = (self.state * self.MULTIPLIER + self.INCREMENT) % self.MODULUS
+        return self.state / self.MODULUS
+
+    @classmethod
+    def affine(cls, n):
+        """(A, C) such that n steps map a state s to (A * s + C) mod 2**31"""
+        A, C = 1, 0
+        step_a, step_c = cls.MULTIPLIER, cls.INCREMENT
+        while n:
+            if n & 1:
+                A, C = (step_a * A) % cls.MODULUS, (step_a * C + step_c) % cls.MODULUS
+            step_a, step_c = (step_a * step_a) % cls.MODULUS, (step_a * step_c + step_c) % cls.MODULUS
+            n >>= 1
+        return A, C
+
+    def jump(self, n):
+        """Advance the generator by n draws in O(log n)"""
+        A, C = self.affine(n)
+        self.state = (A * self.state + C) % self.MODULUS
+
+
+# (A, C) tables for 1..n steps, keyed by n, reused by every chunk of that size
+_affine_tables = {}
+
+def _affine_table(n):
+    """Vectorized (A_j, C_j) for j = 1..n, built by repeated doubling"""
+    if n not in _affine_tables:
+        A = np.ones(1, dtype=np.uint64)
+        C = np.zeros(1, dtype=np.uint64)
+        mask = np.uint64(LCG.MODULUS - 1)
+        while len(A) <= n:
+            # Steps j + L compose L steps after j steps
+            A_L, C_L = (np.uint64(v) for v in LCG.affine(len(A)))
+            A, C = np.concatenate([A, (A * A_L) & mask]), np.concatenate([C, (C * A_L + C_L) & mask])
+        _affine_tables[n] = (A[1:n + 1], C[1:n + 1])
+    return _affine_tables[n]
+
+def _uniforms_numpy(state, n):
+    """The next n LCG uniforms after state, as a float64 array"""
+    A, C = _affine_table(n)
+    states = (A * np.uint64(state) + C) & np.uint64(LCG.MODULUS - 1)
+    return states.astype(np.float64) / LCG.MODULUS
+
+
+def _pair_range(start, stop):
+    """First pair index and pair count covering samples [start, stop)"""
+    first_pair = start // 2
+    return first_pair, (stop + 1) // 2 - first_pair
+
+
+def _generate_numpy(start, stop, seed):
+    first_pair, n_pairs = _pair_range(start, stop)
+    rng = LCG(seed % LCG.MODULUS)
+    rng.jump(first_pair * DRAWS_PER_PAIR)
+    u = _uniforms_numpy(rng.state, n_pairs * DRAWS_PER_PAIR)
+    u = u.reshape(n_pairs, DRAWS_PER_PAIR)
+
+    ndvi = 0.1 + u[:, [0, 5]] * 0.8
+    canopy = u[:, [1, 6]] * 100
+    soil_carbon = 0.5 + u[:, [2, 7]] * 7.5
+
+    # Box-Muller through math.log/cos/sin rather than NumPy's SIMD ufuncs,
+    # which may differ in the last bit; that keeps the noise bit-identical
+    radius = np.sqrt(-2 * np.fromiter(map(math.log, u[:, 3].tolist()), np.float64, n_pairs))
+    angle = (2 * math.pi * u[:, 4]).tolist()
+    cos = np.fromiter(map(math.cos, angle), np.float64, n_pairs)
+    sin = np.fromiter(map(math.sin, angle), np.float64, n_pairs)
+    noise = np.column_stack([3 * radius * cos, 3 * (radius * sin)])
+
+    carbon_seq = np.clip(ndvi * 25 + canopy * 0.15 + soil_carbon * 6 + noise, 0, 100)
+
+    offset = start - 2 * first_pair
+    return {name: column.ravel()[offset:offset + stop - start]
+            for name, column in zip(COLUMNS, (ndvi, canopy, soil_carbon, carbon_seq))}
+
+
+def _generate_array(start, stop, seed):
+    first_pair, n_pairs = _pair_range(start, stop)
+    rng = LCG(seed % LCG.MODULUS)
+    rng.jump(first_pair * DRAWS_PER_PAIR)
+    columns = {name: array('d') for name in COLUMNS}
+
+    spare = None
+    for i in range(2 * first_pair, 2 * (first_pair + n_pairs)):
+        ndvi = 0.1 + rng.random() * 0.8
+        canopy = rng.random() * 100
+        soil_carbon = 0.5 + rng.random() * 7.5
+        if spare is None:
+            u1 = rng.random()
+            u2 = rng.random()
+            spare = math.sqrt(-2 * math.log(u1)) * math.sin(2 * math.pi * u2)
+            noise = 3 * math.sqrt(-2 * math.log(u1)) * math.cos(2 * math.pi * u2)
+        else:
+            noise = 3 * spare
+            spare = None
+        if start <= i < stop:
+            carbon_seq = ndvi * 25 + canopy * 0.15 + soil_carbon * 6 + noise
+            columns['NDVI'].append(ndvi)
+            columns['Canopy_Cover_Percent'].append(canopy)
+            columns['Soil_Carbon_Percent'].append(soil_carbon)
+            columns['Carbon_Sequestration_tCO2e_ha'].append(max(0.0, min(carbon_seq, 100.0)))
+    return columns
+
+
+def generate(start, stop, seed=42, backend=None):
+    """Columns for samples [start, stop) of the stream seeded with seed.
+
+    backend is 'numpy', 'array' or None to use NumPy when it is installed.
+    """
+    if backend is None:
+        backend = 'numpy' if np is not None else 'array'
+    if backend == 'numpy':
+        if np is None:
+            raise ImportError("backend='numpy' requires NumPy")
+        return _generate_numpy(start, stop, seed)
+    if backend == 'array':
+        return _generate_array(start, stop, seed)
+    raise ValueError(f"backend must be 'numpy', 'array' or None, got {backend!r}")
+
+
+def iter_chunks(n_samples, chunk_size=1_000_000, seed=42, start=0, backend=None):
+    """Yield column dicts of at most chunk_size samples covering [start, start + n_samples)"""
+    stop = start + n_samples
+    for chunk_start in range(start, stop, chunk_size):
+        yield generate(chunk_start, min(chunk_start + chunk_size, stop), seed, backend)
+
+
+def _fill_memmaps(paths, start, stop, seed, chunk_size):
+    """Worker: write samples [start, stop) into already-created .npy files"""
+    outputs = {name: np.load(path, mmap_mode='r+') for name, path in paths.items()}
+    position = start
+    for chunk in iter_chunks(stop - start, chunk_size, seed, start, backend='numpy'):
+        n = len(chunk['NDVI'])
+        for name, column in chunk.items():
+            outputs[name][position:position + n] = column
+        position += n
+    for output in outputs.values():
+        output.flush()
+    return stop - start
+
+
+def write_memmap(directory, n_samples, seed=42, chunk_size=1_000_000, n_jobs=1):
+    """Write one float64 .npy file per column, split across n_jobs processes.
+
+    Returns a dict mapping column name to file path.
+    """
+    if np is None:
+        raise ImportError("write_memmap requires NumPy")
+    os.makedirs(directory, exist_ok=True)
+    paths = {name: os.path.join(directory, f"{name}.npy") for name in COLUMNS}
+    for path in paths.values():
+        np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(n_samples,)).flush()
+
+    n_jobs = max(1, n_jobs if n_jobs > 0 else (os.cpu_count() or 1))
+    # Even boundaries keep each Box-Muller pair inside one worker's range
+    bounds = [min(n_samples, 2 * (n_samples * i // (2 * n_jobs))) for i in range(n_jobs)] + [n_samples]
+    if n_jobs == 1:
+        _fill_memmaps(paths, 0, n_samples, seed, chunk_size)
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            list(executor.map(_fill_memmaps, [paths] * n_jobs, bounds[:-1], bounds[1:],
+                              [seed] * n_jobs, [chunk_size] * n_jobs))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('output_dir')
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=1_000_000)
+    parser.add_argument('--n-jobs', type=int, default=1)
+    args = parser.parse_args()
+
+    paths = write_memmap(args.output_dir, args.samples, args.seed, args.chunk_size, args.n_jobs)
+    print(f"✓ Wrote {args.samples:,} samples to {args.output_dir}")
+    for name, path in paths.items():
+        print(f"  {name}: {path}")
+
+
+if __name__ == "__main__":
+    main()